@@ -3,5 +3,7 @@ RemotDesk Server - API Routes Module
 """
 from .devices import router as devices_router
 from .sessions import router as sessions_router
+from .history import router as history_router
+from .admin import router as admin_router
 
-__all__ = ["devices_router", "sessions_router"]
+__all__ = ["devices_router", "sessions_router", "history_router", "admin_router"]
@@ -0,0 +1,90 @@
+"""
+RemotDesk Server - Admin Routes
+Operações internas do worker (deploy, diagnóstico).
+"""
+import asyncio
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ..core.config import get_settings
+from ..core.singleflight import singleflight_stats
+from ..core.loop_monitor import loop_monitor
+from ..core.profiler import ProfilerBusyError, sample_profile
+from ..models import write_coordinator
+from ..websocket import manager, relay_manager
+from .deps import require_admin
+
+settings = get_settings()
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/drain")
+async def drain_worker(
+    window: float = settings.drain_window_seconds,
+    timeout: float = settings.drain_timeout_seconds
+):
+    """
+    Coloca o worker em modo drain sem encerrá-lo.
+    O SIGTERM já faz o drain automaticamente; esta rota serve para
+    antecipá-lo (ex.: tirar o worker do balanceador antes do deploy).
+    """
+    notified = await manager.drain(window, timeout)
+    return {"status": "drained", "notified": notified}
+
+
+@router.get("/relay")
+async def relay_stats():
+    """
+    Banda e throughput do relay de dados neste worker.
+    """
+    return relay_manager.stats()
+
+
+@router.get("/writes")
+async def write_stats():
+    """
+    Métricas do group commit (escritas por transação).
+    """
+    return write_coordinator.stats()
+
+
+@router.get("/singleflight")
+async def coalescing_stats():
+    """
+    Chamadas deduplicadas pela camada de single-flight.
+    """
+    return singleflight_stats()
+
+
+@router.get("/loop")
+async def loop_stats():
+    """
+    Histograma de atraso do event loop e último bloqueio capturado.
+    """
+    return loop_monitor.stats()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=settings.profile_max_seconds),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    all_threads: bool = False
+):
+    """
+    Profile por amostragem do worker em execução.
+    Retorna stacks no formato collapsed (uma por linha, com a contagem de
+    amostras), pronto para flamegraph.pl ou speedscope.
+    Por padrão amostra só a thread do event loop.
+    """
+    thread_id = None if all_threads else threading.get_ident()
+    try:
+        output = await asyncio.to_thread(sample_profile, seconds, interval_ms / 1000, thread_id)
+    except ProfilerBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe um profile em andamento"
+        )
+    return PlainTextResponse(output)
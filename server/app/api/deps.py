@@ -0,0 +1,111 @@
+"""
+RemotDesk Server - API Dependencies
+Autorização por token de dispositivo (JWT verificado localmente).
+"""
+import hmac
+from typing import Iterable, Optional
+
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from ..core.config import get_settings
+from ..core.security import decode_token, DEVICE_SCOPE
+
+settings = get_settings()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _decode_credentials(
+    credentials: Optional[HTTPAuthorizationCredentials],
+    required: bool
+) -> Optional[dict]:
+    """Decodifica o token Bearer; sem token, retorna None se não for obrigatório"""
+    if credentials is None:
+        if required:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de dispositivo não informado",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        return None
+
+    payload = decode_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    return payload
+
+
+async def get_token_payload(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Optional[dict]:
+    """
+    Decodifica o token Bearer da requisição.
+    Retorna None se nenhum token foi enviado e o token não é obrigatório.
+    """
+    return _decode_credentials(credentials, settings.require_device_token)
+
+
+async def require_device_token_strict(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> dict:
+    """
+    Decodifica o token Bearer, sempre obrigatório.
+    Para rotas novas, que não precisam tolerar clientes sem token.
+    """
+    return _decode_credentials(credentials, required=True)
+
+
+def authorize_device(
+    payload: Optional[dict],
+    device_ids: Iterable[str],
+    scopes: Iterable[str] = (DEVICE_SCOPE,)
+):
+    """
+    Garante que o token pertence a um dos dispositivos informados.
+    Sem token (quando permitido), a verificação é ignorada.
+    """
+    if payload is None:
+        return
+
+    if payload.get("sub") not in device_ids or payload.get("scope") not in scopes:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token não autorizado para este dispositivo"
+        )
+
+
+async def require_device_owner(
+    device_id: str,
+    payload: Optional[dict] = Depends(get_token_payload)
+) -> Optional[dict]:
+    """Dependency: token do próprio dispositivo da rota"""
+    authorize_device(payload, (device_id,))
+    return payload
+
+
+async def require_device_owner_strict(
+    device_id: str,
+    payload: dict = Depends(require_device_token_strict)
+) -> dict:
+    """Dependency: token do próprio dispositivo da rota, sempre obrigatório"""
+    authorize_device(payload, (device_id,))
+    return payload
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency: rotas administrativas (header X-Admin-Token)"""
+    if (
+        not settings.admin_token
+        or not x_admin_token
+        or not hmac.compare_digest(x_admin_token, settings.admin_token)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso administrativo negado"
+        )
@@ -1,18 +1,43 @@
 """
 RemotDesk Server - Device Routes
 """
+import asyncio
 import uuid
 from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models import get_db, Device
-from ..schemas import DeviceRegister, DeviceResponse, DeviceUpdate
-from ..core.security import get_password_hash, verify_password
+from ..models import get_db, async_session, write_coordinator, Device
+from ..schemas import (
+    DeviceRegister,
+    DeviceBulkRegister,
+    DeviceResponse,
+    DeviceRegisterResponse,
+    DeviceToken,
+    DeviceUpdate
+)
+from ..core.config import get_settings
+from ..core.security import (
+    get_password_hash_async,
+    verify_password_async,
+    create_device_token,
+    ACCESS_SCOPE,
+    DEVICE_SCOPE
+)
+from ..core.singleflight import SingleFlight
+from ..core.responses import trusted_response
+from .deps import get_token_payload, require_device_owner, require_admin
+
+settings = get_settings()
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
+# Consultas concorrentes do mesmo dispositivo compartilham uma só query
+device_lookups = SingleFlight("device_lookup")
+
 
 def generate_device_id() -> str:
     """Gera ID único para dispositivo no formato XXX-XXX-XXX"""
@@ -20,49 +45,147 @@ def generate_device_id() -> str:
     return f"{raw_id[:3]}-{raw_id[3:6]}-{raw_id[6:9]}"
 
 
-@router.post("/register", response_model=DeviceResponse, status_code=status.HTTP_201_CREATED)
+async def allocate_device_ids(db: AsyncSession, count: int) -> List[str]:
+    """
+    Gera `count` IDs livres, verificando colisões em lote (uma consulta
+    por rodada) e gerando novamente apenas os IDs já existentes.
+    """
+    ids = set()
+    for _ in range(settings.device_id_max_attempts):
+        candidates = set()
+        while len(candidates) < count - len(ids):
+            candidate = generate_device_id()
+            if candidate not in ids:
+                candidates.add(candidate)
+        
+        result = await db.execute(select(Device.id).where(Device.id.in_(candidates)))
+        ids |= candidates - set(result.scalars())
+        if len(ids) == count:
+            return list(ids)
+    
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Não foi possível gerar IDs únicos"
+    )
+
+
+async def _build_device_rows(
+    devices: List[DeviceRegister],
+    is_online: bool = True,
+    bulk: bool = False
+) -> List[dict]:
+    """Monta as linhas de dispositivos, com hashes de senha calculados em paralelo"""
+    async def hash_password(password: Optional[str]) -> Optional[str]:
+        return await get_password_hash_async(password, bulk=bulk) if password else None
+    
+    password_hashes = await asyncio.gather(
+        *(hash_password(device.access_password) for device in devices)
+    )
+    now = datetime.utcnow()
+    return [
+        {
+            "name": device.name,
+            "device_type": device.device_type,
+            "os_info": device.os_info,
+            "access_password_hash": password_hash,
+            "is_online": is_online,
+            "last_seen": now,
+            "created_at": now
+        }
+        for device, password_hash in zip(devices, password_hashes)
+    ]
+
+
+async def insert_devices(db: AsyncSession, rows: List[dict]) -> List[dict]:
+    """
+    Insere os dispositivos numa única transação (insert em lote).
+    Se outro registro concorrente pegar um dos IDs, refaz com IDs novos.
+    """
+    for _ in range(settings.device_id_max_attempts):
+        ids = await allocate_device_ids(db, len(rows))
+        records = [{**row, "id": device_id} for row, device_id in zip(rows, ids)]
+        try:
+            await db.execute(insert(Device), records)
+            await db.commit()
+            return records
+        except IntegrityError:
+            await db.rollback()
+    
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Não foi possível gerar IDs únicos"
+    )
+
+
+def _register_response(record: dict) -> dict:
+    """Resposta de registro com o token do dispositivo"""
+    return {**record, "access_token": create_device_token(record["id"]), "token_type": "bearer"}
+
+
+@router.post("/register", response_model=DeviceRegisterResponse, status_code=status.HTTP_201_CREATED)
 async def register_device(
     device_data: DeviceRegister,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Registra um novo dispositivo no servidor.
-    Retorna o ID único do dispositivo.
-    """
-    device_id = generate_device_id()
-    
-    # Hash da senha se fornecida
-    password_hash = None
-    if device_data.access_password:
-        password_hash = get_password_hash(device_data.access_password)
-    
-    device = Device(
-        id=device_id,
-        name=device_data.name,
-        device_type=device_data.device_type,
-        os_info=device_data.os_info,
-        access_password_hash=password_hash,
-        is_online=True,
-        last_seen=datetime.utcnow()
+    Retorna o ID único do dispositivo e seu token de acesso.
+    """
+    rows = await _build_device_rows([device_data])
+    records = await insert_devices(db, rows)
+    
+    return trusted_response(
+        _register_response(records[0]),
+        DeviceRegisterResponse,
+        status_code=status.HTTP_201_CREATED
     )
+
+
+@router.post(
+    "/register/bulk",
+    response_model=List[DeviceRegisterResponse],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_admin)]
+)
+async def register_devices_bulk(
+    bulk_data: DeviceBulkRegister,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Registra vários dispositivos numa única transação (requer X-Admin-Token).
+    Os dispositivos entram offline, até cada um chamar PUT /devices/{id}/online.
+    Retorna os dispositivos na mesma ordem do pedido, com seus tokens.
+    """
+    rows = await _build_device_rows(bulk_data.devices, is_online=False, bulk=True)
+    records = await insert_devices(db, rows)
     
-    db.add(device)
-    await db.commit()
-    await db.refresh(device)
+    return trusted_response(
+        [_register_response(record) for record in records],
+        DeviceRegisterResponse,
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+async def _load_device(device_id: str) -> Optional[DeviceResponse]:
+    """Carrega o dispositivo numa sessão própria (compartilhada entre chamadores)"""
+    async with async_session() as db:
+        result = await db.execute(select(Device).where(Device.id == device_id))
+        device = result.scalar_one_or_none()
     
-    return device
+    return DeviceResponse.model_validate(device) if device else None
+
+
+async def fetch_device(device_id: str) -> Optional[DeviceResponse]:
+    """Busca o dispositivo, coalescendo consultas concorrentes pelo mesmo ID"""
+    return await device_lookups.do(device_id, lambda: _load_device(device_id))
 
 
 @router.get("/{device_id}", response_model=DeviceResponse)
-async def get_device(
-    device_id: str,
-    db: AsyncSession = Depends(get_db)
-):
+async def get_device(device_id: str):
     """
     Obtém informações de um dispositivo pelo ID.
     """
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
+    device = await fetch_device(device_id)
     
     if not device:
         raise HTTPException(
@@ -70,29 +193,56 @@ async def get_device(
             detail="Dispositivo não encontrado"
         )
     
-    return device
+    return trusted_response(device, DeviceResponse)
 
 
-@router.put("/{device_id}/online")
-async def set_device_online(
+@router.post("/{device_id}/token", response_model=DeviceToken)
+async def refresh_device_token(
     device_id: str,
-    db: AsyncSession = Depends(get_db)
+    payload: Optional[dict] = Depends(require_device_owner)
 ):
     """
-    Marca dispositivo como online.
+    Renova o token do dispositivo a partir de um token ainda válido.
     """
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
-    
-    if not device:
+    if payload is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dispositivo não encontrado"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de dispositivo não informado",
+            headers={"WWW-Authenticate": "Bearer"}
         )
     
-    device.is_online = True
-    device.last_seen = datetime.utcnow()
-    await db.commit()
+    return {
+        "access_token": create_device_token(device_id),
+        "expires_in": settings.device_token_expire_minutes * 60
+    }
+
+
+async def _set_device_status(device_id: str, is_online: bool):
+    """Atualiza o status do dispositivo pelo escritor único (group commit)"""
+    async def operation(db: AsyncSession):
+        result = await db.execute(
+            update(Device)
+            .where(Device.id == device_id)
+            .values(is_online=is_online, last_seen=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dispositivo não encontrado"
+            )
+    
+    await write_coordinator.submit(operation)
+
+
+@router.put("/{device_id}/online")
+async def set_device_online(
+    device_id: str,
+    payload: Optional[dict] = Depends(require_device_owner)
+):
+    """
+    Marca dispositivo como online.
+    """
+    await _set_device_status(device_id, True)
     
     return {"status": "online", "device_id": device_id}
 
@@ -100,23 +250,12 @@ async def set_device_online(
 @router.put("/{device_id}/offline")
 async def set_device_offline(
     device_id: str,
-    db: AsyncSession = Depends(get_db)
+    payload: Optional[dict] = Depends(require_device_owner)
 ):
     """
     Marca dispositivo como offline.
     """
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
-    
-    if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dispositivo não encontrado"
-        )
-    
-    device.is_online = False
-    device.last_seen = datetime.utcnow()
-    await db.commit()
+    await _set_device_status(device_id, False)
     
     return {"status": "offline", "device_id": device_id}
 
@@ -125,11 +264,24 @@ async def set_device_offline(
 async def verify_device_password(
     device_id: str,
     password: str,
+    payload: Optional[dict] = Depends(get_token_payload),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Verifica a senha de acesso do dispositivo.
+    Se o viewer enviar seu token de dispositivo, retorna também um token
+    de acesso vinculado a ele, evitando novas verificações bcrypt durante
+    a validade do token.
     """
+    viewer_id = None
+    if payload is not None and payload.get("scope") == DEVICE_SCOPE:
+        viewer_id = payload["sub"]
+    
+    def access_grant() -> dict:
+        if viewer_id is None:
+            return {}
+        return {"access_token": create_device_token(device_id, ACCESS_SCOPE, viewer_id)}
+
     result = await db.execute(select(Device).where(Device.id == device_id))
     device = result.scalar_one_or_none()
     
@@ -140,9 +292,13 @@ async def verify_device_password(
         )
     
     if not device.access_password_hash:
-        return {"valid": True, "message": "Dispositivo não requer senha"}
+        return {
+            "valid": True,
+            "message": "Dispositivo não requer senha",
+            **access_grant()
+        }
     
-    is_valid = verify_password(password, device.access_password_hash)
+    is_valid = await verify_password_async(password, device.access_password_hash)
     
     if not is_valid:
         raise HTTPException(
@@ -150,4 +306,4 @@ async def verify_device_password(
             detail="Senha incorreta"
         )
     
-    return {"valid": True}
+    return {"valid": True, **access_grant()}
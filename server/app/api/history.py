@@ -0,0 +1,321 @@
+"""
+RemotDesk Server - History Routes
+Histórico de sessões e logs de conexão por dispositivo, com paginação
+por cursor (keyset) sobre colunas indexadas e exportação em NDJSON.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select, or_, and_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models import get_db, async_session, Session, ConnectionLog
+from ..schemas import (
+    SessionResponse,
+    SessionPage,
+    ConnectionLogResponse,
+    ConnectionLogPage
+)
+from ..core.config import get_settings
+from ..core.responses import trusted_response
+from .deps import require_device_owner_strict
+
+settings = get_settings()
+
+router = APIRouter(prefix="/devices", tags=["History"])
+
+ROLE_PATTERN = "^(host|viewer|any)$"
+
+
+# ============ Cursor ============
+
+def encode_cursor(timestamp: datetime, row_id) -> str:
+    """Codifica a posição (timestamp, id) do último item retornado"""
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, object]:
+    """Decodifica um cursor gerado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(row_id, bool) or not isinstance(row_id, (str, int)):
+            raise TypeError("id do cursor deve ser str ou int")
+        return datetime.fromisoformat(timestamp), row_id
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def _after_cursor(time_column, id_column, cursor: Tuple, descending: bool):
+    """Condição keyset: itens estritamente depois do cursor na ordenação"""
+    timestamp, row_id = cursor
+    if descending:
+        return or_(
+            time_column < timestamp,
+            and_(time_column == timestamp, id_column < row_id)
+        )
+    return or_(
+        time_column > timestamp,
+        and_(time_column == timestamp, id_column > row_id)
+    )
+
+
+def _order_by(time_column, id_column, descending: bool):
+    """Ordenação estável por (timestamp, id)"""
+    if descending:
+        return (time_column.desc(), id_column.desc())
+    return (time_column.asc(), id_column.asc())
+
+
+# ============ Queries ============
+
+def _history_query(
+    model,
+    time_attr: str,
+    device_id: str,
+    role: str,
+    conditions: list,
+    cursor: Optional[Tuple],
+    descending: bool,
+    limit: int
+):
+    """
+    Query paginada por papel do dispositivo.
+    Para role=any, cada papel vira uma subquery ordenada pelo seu índice
+    (device_id, tempo) com LIMIT próprio, unidas com UNION ALL; só as
+    2 * limit linhas resultantes são reordenadas (evita OR entre índices,
+    que ordenaria todo o histórico do dispositivo a cada página).
+    """
+    def branch(entity, role_condition):
+        time_column = getattr(entity, time_attr)
+        query = select(entity).where(role_condition, *conditions)
+        if cursor:
+            query = query.where(_after_cursor(time_column, entity.id, cursor, descending))
+        return query.order_by(*_order_by(time_column, entity.id, descending)).limit(limit)
+
+    if role == "host":
+        return branch(model, model.host_device_id == device_id)
+    if role == "viewer":
+        return branch(model, model.viewer_device_id == device_id)
+
+    host = branch(model, model.host_device_id == device_id).subquery()
+    # Quem é host e viewer ao mesmo tempo já veio pelo ramo host
+    viewer = branch(
+        model,
+        and_(model.viewer_device_id == device_id, model.host_device_id != device_id)
+    ).subquery()
+    merged = aliased(model, union_all(select(host), select(viewer)).subquery())
+    return (
+        select(merged)
+        .order_by(*_order_by(getattr(merged, time_attr), merged.id, descending))
+        .limit(limit)
+    )
+
+
+def sessions_query(
+    device_id: str,
+    role: str = "any",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status_filter: Optional[str] = None,
+    cursor: Optional[Tuple] = None,
+    descending: bool = True,
+    limit: int = 50
+):
+    """Monta a query paginada de sessões de um dispositivo"""
+    conditions = []
+    if since:
+        conditions.append(Session.created_at >= since)
+    if until:
+        conditions.append(Session.created_at < until)
+    if status_filter:
+        conditions.append(Session.status == status_filter)
+
+    return _history_query(
+        Session, "created_at", device_id, role, conditions, cursor, descending, limit
+    )
+
+
+def logs_query(
+    device_id: str,
+    role: str = "any",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    action: Optional[str] = None,
+    cursor: Optional[Tuple] = None,
+    descending: bool = True,
+    limit: int = 50
+):
+    """Monta a query paginada de logs de conexão de um dispositivo"""
+    conditions = []
+    if since:
+        conditions.append(ConnectionLog.timestamp >= since)
+    if until:
+        conditions.append(ConnectionLog.timestamp < until)
+    if action:
+        conditions.append(ConnectionLog.action == action)
+
+    return _history_query(
+        ConnectionLog, "timestamp", device_id, role, conditions, cursor, descending, limit
+    )
+
+
+async def stream_ndjson(
+    build_query,
+    time_attr: str,
+    schema: type[BaseModel],
+    chunk_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Gera linhas NDJSON em blocos keyset.
+    Cada bloco usa uma sessão curta, sem manter transação de leitura aberta
+    durante toda a exportação.
+    """
+    cursor = None
+    while True:
+        async with async_session() as db:
+            result = await db.execute(build_query(cursor=cursor, limit=chunk_size))
+            rows = result.scalars().all()
+
+        if not rows:
+            return
+
+        yield b"".join(
+            schema.model_validate(row).model_dump_json().encode() + b"\n"
+            for row in rows
+        )
+
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+        cursor = (getattr(last, time_attr), last.id)
+
+
+def _page_cursor(rows, time_attr: str, limit: int) -> Optional[str]:
+    """Cursor da próxima página, ou None se não houver mais itens"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, time_attr), last.id)
+
+
+# ============ Sessões ============
+
+@router.get("/{device_id}/sessions", response_model=SessionPage)
+async def list_device_sessions(
+    device_id: str,
+    role: str = Query("any", pattern=ROLE_PATTERN),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session_status: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    payload: dict = Depends(require_device_owner_strict),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lista as sessões de um dispositivo, mais recentes primeiro.
+    Use next_cursor para buscar a próxima página.
+    """
+    query = sessions_query(
+        device_id, role, since, until, session_status,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+    result = await db.execute(query)
+    rows = result.scalars().all()
+
+    return trusted_response(
+        {"items": rows, "next_cursor": _page_cursor(rows, "created_at", limit)},
+        SessionPage
+    )
+
+
+@router.get("/{device_id}/sessions/export")
+async def export_device_sessions(
+    device_id: str,
+    role: str = Query("any", pattern=ROLE_PATTERN),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session_status: Optional[str] = Query(None, alias="status"),
+    payload: dict = Depends(require_device_owner_strict)
+):
+    """
+    Exporta todas as sessões do dispositivo em NDJSON (ordem cronológica).
+    """
+    def build_query(cursor, limit):
+        return sessions_query(
+            device_id, role, since, until, session_status,
+            cursor=cursor, descending=False, limit=limit
+        )
+
+    return StreamingResponse(
+        stream_ndjson(build_query, "created_at", SessionResponse, settings.history_export_chunk_size),
+        media_type="application/x-ndjson"
+    )
+
+
+# ============ Logs de Conexão ============
+
+@router.get("/{device_id}/logs", response_model=ConnectionLogPage)
+async def list_device_logs(
+    device_id: str,
+    role: str = Query("any", pattern=ROLE_PATTERN),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    action: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    payload: dict = Depends(require_device_owner_strict),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lista os logs de conexão de um dispositivo, mais recentes primeiro.
+    Use next_cursor para buscar a próxima página.
+    """
+    query = logs_query(
+        device_id, role, since, until, action,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+    result = await db.execute(query)
+    rows = result.scalars().all()
+
+    return trusted_response(
+        {"items": rows, "next_cursor": _page_cursor(rows, "timestamp", limit)},
+        ConnectionLogPage
+    )
+
+
+@router.get("/{device_id}/logs/export")
+async def export_device_logs(
+    device_id: str,
+    role: str = Query("any", pattern=ROLE_PATTERN),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    action: Optional[str] = None,
+    payload: dict = Depends(require_device_owner_strict)
+):
+    """
+    Exporta todos os logs de conexão do dispositivo em NDJSON (ordem cronológica).
+    """
+    def build_query(cursor, limit):
+        return logs_query(
+            device_id, role, since, until, action,
+            cursor=cursor, descending=False, limit=limit
+        )
+
+    return StreamingResponse(
+        stream_ndjson(build_query, "timestamp", ConnectionLogResponse, settings.history_export_chunk_size),
+        media_type="application/x-ndjson"
+    )
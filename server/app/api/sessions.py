@@ -3,12 +3,18 @@ RemotDesk Server - Session Routes
 """
 import uuid
 from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models import get_db, Device, Session, ConnectionLog
+from ..models import get_db, write_coordinator, Session, ConnectionLog
 from ..schemas import SessionCreate, SessionResponse
+from ..core.ice import ice_provider
+from ..core.security import ACCESS_SCOPE
+from ..core.responses import trusted_response
+from .deps import get_token_payload, authorize_device
+from .devices import fetch_device
 
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
@@ -16,16 +22,26 @@ router = APIRouter(prefix="/sessions", tags=["Sessions"])
 @router.post("/create", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     session_data: SessionCreate,
+    payload: Optional[dict] = Depends(get_token_payload),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Cria uma nova sessão de conexão entre dois dispositivos.
+    Aceita o token do viewer ou o token de acesso ao dispositivo alvo
+    emitido por /devices/{id}/verify-password para este mesmo viewer.
     """
+    if payload is not None and payload.get("scope") == ACCESS_SCOPE:
+        authorize_device(payload, (session_data.target_device_id,), scopes=(ACCESS_SCOPE,))
+        if payload.get("viewer") != session_data.viewer_device_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Token de acesso emitido para outro dispositivo"
+            )
+    else:
+        authorize_device(payload, (session_data.viewer_device_id,))
+    
     # Verificar se o dispositivo alvo existe
-    result = await db.execute(
-        select(Device).where(Device.id == session_data.target_device_id)
-    )
-    target_device = result.scalar_one_or_none()
+    target_device = await fetch_device(session_data.target_device_id)
     
     if not target_device:
         raise HTTPException(
@@ -52,12 +68,13 @@ async def create_session(
     await db.commit()
     await db.refresh(session)
     
-    return session
+    return trusted_response(session, SessionResponse, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: str,
+    payload: Optional[dict] = Depends(get_token_payload),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -72,48 +89,71 @@ async def get_session(
             detail="Sessão não encontrada"
         )
     
-    return session
+    authorize_device(payload, (session.host_device_id, session.viewer_device_id))
+    
+    return trusted_response(session, SessionResponse)
+
+
+async def _update_session_status(
+    session_id: str,
+    payload: Optional[dict],
+    new_status: str,
+    host_only: bool,
+    log_action: Optional[str] = None
+):
+    """
+    Muda o status da sessão pelo escritor único (group commit).
+    Validação e autorização acontecem antes de qualquer alteração.
+    """
+    async def operation(db: AsyncSession):
+        result = await db.execute(select(Session).where(Session.id == session_id))
+        session = result.scalar_one_or_none()
+        
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Sessão não encontrada"
+            )
+        
+        if host_only:
+            authorize_device(payload, (session.host_device_id,))
+        else:
+            authorize_device(payload, (session.host_device_id, session.viewer_device_id))
+        
+        session.status = new_status
+        if new_status == "active":
+            session.started_at = datetime.utcnow()
+        else:
+            session.ended_at = datetime.utcnow()
+        
+        # Log da conexão/desconexão
+        if log_action:
+            db.add(ConnectionLog(
+                session_id=session_id,
+                host_device_id=session.host_device_id,
+                viewer_device_id=session.viewer_device_id,
+                action=log_action
+            ))
+    
+    await write_coordinator.submit(operation)
 
 
 @router.put("/{session_id}/accept")
 async def accept_session(
     session_id: str,
-    db: AsyncSession = Depends(get_db)
+    region: Optional[str] = None,
+    payload: Optional[dict] = Depends(get_token_payload)
 ):
     """
     Aceita uma sessão de conexão.
     """
-    result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Sessão não encontrada"
-        )
-    
-    session.status = "active"
-    session.started_at = datetime.utcnow()
-    
-    # Log da conexão
-    log = ConnectionLog(
-        session_id=session_id,
-        host_device_id=session.host_device_id,
-        viewer_device_id=session.viewer_device_id,
-        action="connected"
-    )
-    db.add(log)
-    
-    await db.commit()
+    await _update_session_status(session_id, payload, "active", host_only=True, log_action="connected")
     
     # Retornar configurações ICE para WebRTC
     return {
         "status": "active",
         "session_id": session_id,
-        "ice_servers": [
-            {"urls": "stun:stun.l.google.com:19302"},
-            {"urls": "stun:stun1.l.google.com:19302"}
-        ]
+        "ice_servers": ice_provider.get_ice_servers(session_id, region)
     }
 
 
@@ -121,24 +161,12 @@ async def accept_session(
 async def reject_session(
     session_id: str,
     reason: str = "Rejeitado pelo usuário",
-    db: AsyncSession = Depends(get_db)
+    payload: Optional[dict] = Depends(get_token_payload)
 ):
     """
     Rejeita uma sessão de conexão.
     """
-    result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Sessão não encontrada"
-        )
-    
-    session.status = "rejected"
-    session.ended_at = datetime.utcnow()
-    
-    await db.commit()
+    await _update_session_status(session_id, payload, "rejected", host_only=True)
     
     return {"status": "rejected", "reason": reason}
 
@@ -146,32 +174,13 @@ async def reject_session(
 @router.put("/{session_id}/end")
 async def end_session(
     session_id: str,
-    db: AsyncSession = Depends(get_db)
+    payload: Optional[dict] = Depends(get_token_payload)
 ):
     """
     Encerra uma sessão ativa.
     """
-    result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Sessão não encontrada"
-        )
-    
-    session.status = "ended"
-    session.ended_at = datetime.utcnow()
-    
-    # Log da desconexão
-    log = ConnectionLog(
-        session_id=session_id,
-        host_device_id=session.host_device_id,
-        viewer_device_id=session.viewer_device_id,
-        action="disconnected"
+    await _update_session_status(
+        session_id, payload, "ended", host_only=False, log_action="disconnected"
     )
-    db.add(log)
-    
-    await db.commit()
     
     return {"status": "ended", "session_id": session_id}
@@ -0,0 +1,70 @@
+"""
+RemotDesk Server - CLI de Arquivamento de Logs
+Uso:
+    python -m app.archive export                    # arquiva logs mais antigos que a retenção
+    python -m app.archive export --older-than-days 7 --format parquet
+    python -m app.archive read --since 2024-01-01 --until 2024-02-01 > logs.ndjson
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+
+from .core.config import get_settings
+from .models import dispose_engine, archive_logs, iter_archived_logs
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    stream=sys.stderr
+)
+logger = logging.getLogger("app.archive")
+
+settings = get_settings()
+
+
+async def export(args: argparse.Namespace) -> int:
+    """Arquiva e remove logs antigos da tabela"""
+    before = datetime.utcnow() - timedelta(days=args.older_than_days)
+    try:
+        stats = await archive_logs(
+            before,
+            args.archive_dir,
+            fmt=args.format,
+            chunk_size=args.chunk_size
+        )
+    finally:
+        await dispose_engine()
+    
+    logger.info(f"Logs arquivados: {stats['rows']} linhas em {stats['files']} arquivos")
+    return 0
+
+
+def read(args: argparse.Namespace) -> int:
+    """Escreve os logs arquivados do período em NDJSON na saída padrão"""
+    for record in iter_archived_logs(args.archive_dir, args.since, args.until):
+        record["timestamp"] = record["timestamp"].isoformat()
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arquivamento de logs de conexão")
+    parser.add_argument("--archive-dir", default=settings.archive_dir)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = commands.add_parser("export", help="arquiva logs antigos")
+    export_parser.add_argument("--older-than-days", type=int, default=settings.archive_retention_days)
+    export_parser.add_argument("--format", choices=["ndjson", "parquet"], default=settings.archive_format)
+    export_parser.add_argument("--chunk-size", type=int, default=settings.archive_chunk_size)
+    
+    read_parser = commands.add_parser("read", help="lê logs arquivados")
+    read_parser.add_argument("--since", type=datetime.fromisoformat)
+    read_parser.add_argument("--until", type=datetime.fromisoformat)
+    
+    args = parser.parse_args()
+    if args.command == "export":
+        sys.exit(asyncio.run(export(args)))
+    sys.exit(read(args))
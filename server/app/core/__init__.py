@@ -2,18 +2,42 @@
 RemotDesk Server - Core Module
 """
 from .config import get_settings, Settings
+from .ice import IceServerProvider, ice_provider
+from .singleflight import SingleFlight, singleflight_stats
+from .loop_monitor import LoopLagMonitor, loop_monitor
+from .profiler import ProfilerBusyError, sample_profile
 from .security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
-    decode_token
+    decode_token,
+    create_device_token,
+    verify_device_token,
+    DEVICE_SCOPE,
+    ACCESS_SCOPE
 )
 
 __all__ = [
     "get_settings",
     "Settings",
+    "IceServerProvider",
+    "ice_provider",
+    "SingleFlight",
+    "singleflight_stats",
+    "LoopLagMonitor",
+    "loop_monitor",
+    "ProfilerBusyError",
+    "sample_profile",
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "create_access_token",
-    "decode_token"
+    "decode_token",
+    "create_device_token",
+    "verify_device_token",
+    "DEVICE_SCOPE",
+    "ACCESS_SCOPE"
 ]
@@ -21,9 +21,83 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    device_token_expire_minutes: int = 60
+    token_cache_size: int = 4096
+    # Exige token de dispositivo no WebSocket e nas rotas protegidas.
+    # Com False, tokens enviados são validados mas a ausência é tolerada
+    # (período de migração dos clientes).
+    require_device_token: bool = False
+    password_hash_workers: int = 4
+    # Threads separadas para o registro em lote, que não disputa com os logins
+    bulk_hash_workers: int = 1
+    # Token para rotas /admin (X-Admin-Token); vazio desabilita as rotas
+    admin_token: str = ""
+    
+    # ICE (WebRTC)
+    stun_servers: list[str] = [
+        "stun:stun.l.google.com:19302",
+        "stun:stun1.l.google.com:19302"
+    ]
+    # Ex.: [{"urls": ["turn:turn-gru.example.com:3478"], "region": "gru"}]
+    turn_servers: list[dict] = []
+    turn_secret: str = ""  # static-auth-secret do coturn
+    turn_credential_ttl: int = 3600  # segundos
+    ice_refresh_margin: int = 300  # renova credenciais faltando N segundos
+    ice_region: str = ""  # região padrão para ordenar servidores TURN
+    ice_cache_size: int = 10000
+    
+    # Mailbox de sinalização (peers em reconexão)
+    mailbox_ttl_seconds: float = 10.0
+    mailbox_max_messages: int = 200
+    mailbox_max_bytes_per_device: int = 256 * 1024
+    mailbox_max_total_bytes: int = 32 * 1024 * 1024
+    
+    # Retomada de conexões WebSocket
+    resume_grace_seconds: float = 30.0
+    resume_buffer_size: int = 256
+    resume_buffer_max_bytes: int = 256 * 1024  # por dispositivo
+    resume_buffer_max_total_bytes: int = 32 * 1024 * 1024  # por worker
+    
+    # Drain (deploy sem downtime)
+    drain_window_seconds: float = 20.0  # espalha as reconexões neste intervalo
+    drain_timeout_seconds: float = 25.0
+    
+    # Relay de dados (fallback quando o WebRTC P2P falha)
+    relay_max_bytes_per_second: int = 0  # por sessão; 0 = sem limite
+    relay_max_frame_bytes: int = 1024 * 1024
+    relay_pair_timeout_seconds: float = 30.0
+    
+    # Provisionamento de dispositivos
+    bulk_register_max: int = 1000
+    device_id_max_attempts: int = 5
     
     # Database
     database_url: str = "sqlite+aiosqlite:///./remotdesk.db"
+    # Aplica migrações pendentes no startup (desative em produção e
+    # rode "python -m app.migrate" antes de subir os workers)
+    auto_migrate: bool = True
+    # Group commit: máximo de escritas por transação e espera para juntar lotes
+    write_batch_max: int = 100
+    write_batch_window_ms: float = 0.0
+    
+    # Histórico
+    history_export_chunk_size: int = 1000
+    
+    # Arquivamento de logs (python -m app.archive)
+    archive_dir: str = "./archive"
+    archive_format: str = "ndjson"  # ndjson, parquet
+    archive_retention_days: int = 30
+    archive_chunk_size: int = 5000
+    
+    # Diagnóstico do event loop
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_ms: int = 250
+    loop_lag_threshold_ms: int = 100  # acima disso loga a stack do bloqueio
+    profile_max_seconds: float = 60.0  # duração máxima de /admin/profile
+    
+    # Respostas JSON com orjson e sem revalidação de objetos montados pelo
+    # próprio servidor (requer orjson; sem ele cai no JSON padrão)
+    fast_json: bool = True
     
     # CORS
     cors_origins: list[str] = ["*"]
@@ -0,0 +1,89 @@
+"""
+RemotDesk Server - Servidores ICE
+Monta a lista de servidores STUN/TURN entregue aos peers, com credenciais
+TURN temporárias (HMAC, padrão "TURN REST API" do coturn: use-auth-secret).
+"""
+import base64
+import hashlib
+import hmac
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import Settings, get_settings
+
+
+class IceServerProvider:
+    """
+    Gera e cacheia a lista de servidores ICE por sessão.
+    A lista com credenciais fica em cache até próximo da expiração.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.stun_servers = [{"urls": url} for url in settings.stun_servers]
+        self.turn_enabled = bool(settings.turn_servers and settings.turn_secret)
+        # Mapeia (session_id, region) -> (expira_em, servidores)
+        self._cache: Dict[Tuple[str, str], Tuple[float, List[dict]]] = {}
+
+    def _turn_credentials(self, session_id: str, expires_at: int) -> Tuple[str, str]:
+        """Usuário e senha TURN válidos até expires_at"""
+        username = f"{expires_at}:{session_id}"
+        digest = hmac.new(
+            self.settings.turn_secret.encode(),
+            username.encode(),
+            hashlib.sha1
+        ).digest()
+        return username, base64.b64encode(digest).decode()
+
+    def _order_by_region(self, servers: List[dict], region: str) -> List[dict]:
+        """Coloca os servidores da região do peer primeiro"""
+        if not region:
+            return servers
+        return sorted(servers, key=lambda server: server.get("region") != region)
+
+    def _build(self, session_id: str, region: str, now: float) -> Tuple[float, List[dict]]:
+        """Calcula a lista de servidores e sua validade"""
+        turn_servers = self._order_by_region(list(self.settings.turn_servers), region)
+        expires_at = int(now) + self.settings.turn_credential_ttl
+        username, credential = self._turn_credentials(session_id, expires_at)
+
+        servers = [
+            {"urls": server["urls"], "username": username, "credential": credential}
+            for server in turn_servers
+        ]
+        return expires_at, self.stun_servers + servers
+
+    def _purge(self, now: float):
+        """Remove entradas expiradas quando o cache cresce demais"""
+        if len(self._cache) < self.settings.ice_cache_size:
+            return
+        for key, (expires_at, _) in list(self._cache.items()):
+            if expires_at <= now:
+                del self._cache[key]
+        while len(self._cache) >= self.settings.ice_cache_size:
+            del self._cache[next(iter(self._cache))]
+
+    def get_ice_servers(self, session_id: str, region: Optional[str] = None) -> List[dict]:
+        """
+        Retorna a lista de servidores ICE para uma sessão.
+        Renova as credenciais quando restam menos de ice_refresh_margin segundos.
+        """
+        if not self.turn_enabled:
+            return self.stun_servers
+
+        region = region or self.settings.ice_region
+        key = (session_id, region)
+        now = time.time()
+
+        cached = self._cache.get(key)
+        if cached and cached[0] - now > self.settings.ice_refresh_margin:
+            return cached[1]
+
+        self._purge(now)
+        expires_at, servers = self._build(session_id, region, now)
+        self._cache[key] = (expires_at, servers)
+        return servers
+
+
+# Instância global do provedor
+ice_provider = IceServerProvider(get_settings())
@@ -0,0 +1,139 @@
+"""
+RemotDesk Server - Monitor de Atraso do Event Loop
+Sinalização, REST, bcrypt e banco dividem o mesmo event loop por worker:
+qualquer chamada bloqueante trava todos os sockets. O monitor mede o
+atraso (lag) do loop num histograma e, quando ele passa do limite, uma
+thread de vigilância loga a stack do código que está bloqueando o loop.
+"""
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Limites superiores dos buckets do histograma (ms)
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LoopLagMonitor:
+    """
+    Mede o atraso do event loop com um timer periódico.
+    O atraso é a diferença entre quando o timer deveria acordar e quando
+    de fato acordou.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.slow_events = 0
+        # Último bloqueio capturado pela thread de vigilância
+        self.last_stall: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self.loop_thread_id: Optional[int] = None
+        self.last_tick = time.monotonic()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Inicia o timer no loop atual e a thread de vigilância"""
+        if self.task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self._stopped.clear()
+        self.task = asyncio.create_task(self._run())
+        self.watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self.watchdog.start()
+
+    async def stop(self):
+        """Para o timer e a thread de vigilância"""
+        if self.task is None:
+            return
+        self._stopped.set()
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        self.watchdog.join(timeout=1)
+        self.watchdog = None
+
+    async def _run(self):
+        """Timer periódico que mede o atraso de cada despertar"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_tick = now
+            self.record(max(0.0, now - expected))
+
+    def record(self, lag: float):
+        """Registra uma medição de atraso (segundos)"""
+        lag_ms = lag * 1000
+        self.buckets[bisect.bisect_left(BUCKETS_MS, lag_ms)] += 1
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            self.slow_events += 1
+            logger.warning(f"Event loop atrasado em {lag_ms:.1f} ms")
+
+    def _watch(self):
+        """
+        Thread de vigilância: se o timer não acorda a tempo, o loop está
+        preso num callback; captura a stack da thread do loop nesse momento.
+        """
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            tick = self.last_tick
+            stalled = time.monotonic() - tick - self.interval
+            if stalled < self.threshold or reported == tick:
+                continue
+            reported = tick
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.last_stall = {
+                "stalled_ms": round(stalled * 1000, 1),
+                "at": time.time(),
+                "stack": stack
+            }
+            logger.warning(f"Event loop bloqueado há {stalled * 1000:.0f} ms em:\n{stack}")
+
+    def stats(self) -> dict:
+        """Histograma e resumo do atraso do loop"""
+        labels = [f"<={limit}ms" for limit in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "running": self.task is not None,
+            "interval_ms": round(self.interval * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "samples": self.samples,
+            "mean_lag_ms": round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "slow_events": self.slow_events,
+            "histogram": dict(zip(labels, self.buckets)),
+            "last_stall": self.last_stall
+        }
+
+
+# Instância global do worker
+loop_monitor = LoopLagMonitor(
+    interval=settings.loop_lag_interval_ms / 1000,
+    threshold=settings.loop_lag_threshold_ms / 1000
+)
@@ -0,0 +1,72 @@
+"""
+RemotDesk Server - Profiler por Amostragem
+Amostra periodicamente as stacks das threads do worker em execução
+(sys._current_frames) e agrega no formato "collapsed stacks", aceito
+por flamegraph.pl, speedscope e similares.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+# Apenas um profile por vez no worker
+_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Já existe um profile em andamento"""
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Nome do frame: função (diretório/arquivo:linha de definição)"""
+    code = frame.f_code
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    """Stack da raiz até o frame atual, separada por ';'"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_profile(
+    duration: float,
+    interval: float,
+    thread_id: Optional[int] = None
+) -> str:
+    """
+    Amostra as stacks por `duration` segundos, a cada `interval` segundos.
+    Com `thread_id`, amostra apenas essa thread (ex.: a do event loop);
+    sem ele, todas as threads, com o nome da thread como raiz da stack.
+    Bloqueia quem chama: execute fora do event loop.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("Já existe um profile em andamento")
+
+    try:
+        own_id = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_id or (thread_id is not None and ident != thread_id):
+                    continue
+                stack = _collapse(frame)
+                if thread_id is None:
+                    stack = f"{names.get(ident, ident)};{stack}"
+                counts[stack] += 1
+            time.sleep(interval)
+    finally:
+        _lock.release()
+
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,91 @@
+"""
+RemotDesk Server - Respostas JSON rápidas
+Serialização com orjson (quando instalado) e atalho para objetos
+confiáveis (ORM/schemas montados pelo próprio servidor), que dispensam a
+validação do response_model.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+settings = get_settings()
+
+# Modo rápido só é possível com orjson instalado
+FAST_JSON = settings.fast_json and orjson is not None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada com orjson"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_json(content: Any) -> bytes:
+    """Serializa para JSON (orjson se disponível)"""
+    return FastJSONResponse(content).body
+
+
+def static_json(content: Any, status_code: int = 200) -> Response:
+    """Resposta com corpo pré-serializado (para payloads que nunca mudam)"""
+    return Response(encode_json(content), status_code=status_code, media_type="application/json")
+
+
+def _nested_model(annotation: Any) -> Any:
+    """Schema dos itens de um campo list[Schema], se houver"""
+    args = getattr(annotation, "__args__", ())
+    if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+        return args[0]
+    return None
+
+
+def _to_plain(obj: Any, model: type[BaseModel]) -> Any:
+    """Converte objeto confiável em dict apenas com os campos do schema"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    
+    get = obj.get if isinstance(obj, dict) else lambda field: getattr(obj, field)
+    plain = {}
+    for field, info in model.model_fields.items():
+        value = get(field)
+        item_model = _nested_model(info.annotation)
+        if item_model is not None and isinstance(value, list):
+            value = [_to_plain(item, item_model) for item in value]
+        plain[field] = value
+    return plain
+
+
+def trusted_response(
+    content: Any,
+    model: type[BaseModel],
+    status_code: int = 200
+) -> Any:
+    """
+    Serializa conteúdo montado pelo servidor sem passar pela validação do
+    response_model. Com fast_json desligado, devolve o conteúdo para o
+    caminho padrão do FastAPI.
+    `content` pode ser um objeto ORM, dict, schema ou lista deles.
+    """
+    if not FAST_JSON:
+        return content
+
+    if isinstance(content, list):
+        payload = [_to_plain(item, model) for item in content]
+    else:
+        payload = _to_plain(content, model)
+
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+        status_code=status_code,
+        media_type="application/json"
+    )
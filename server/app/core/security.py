@@ -1,30 +1,100 @@
 """
 RemotDesk Server - Segurança e Autenticação
+passlib/bcrypt e jose (com cryptography) são importados no primeiro uso,
+fora do caminho de importação da aplicação.
 """
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Iterable, Optional
 from .config import get_settings
 
 settings = get_settings()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (criado sob demanda)
+_pwd_context = None
+
+# Escopos dos tokens de dispositivo
+DEVICE_SCOPE = "device"   # o próprio dispositivo (registro/refresh)
+ACCESS_SCOPE = "access"   # acesso concedido após verificar a senha do host
+
+# Cache de tokens já decodificados: token -> payload
+_token_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+# Threads para bcrypt (libera o GIL), fora do event loop.
+# O registro em lote tem pool próprio para não atrasar verificações de senha.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_bulk_hash_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pwd_context():
+    """Cria o contexto do passlib sob demanda"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def warm_up():
+    """Carrega passlib/bcrypt e jose antecipadamente (fora do event loop)"""
+    _get_pwd_context()
+    from jose import jwt  # noqa: F401
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha está correta"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Gera hash da senha"""
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    """Cria o executor de hashing sob demanda"""
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
+
+def _get_bulk_hash_executor() -> ThreadPoolExecutor:
+    """Cria o executor de hashing do registro em lote sob demanda"""
+    global _bulk_hash_executor
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ThreadPoolExecutor(
+            max_workers=settings.bulk_hash_workers,
+            thread_name_prefix="bcrypt-bulk"
+        )
+    return _bulk_hash_executor
+
+
+async def get_password_hash_async(password: str, bulk: bool = False) -> str:
+    """Gera hash da senha em thread separada (`bulk` usa o pool do lote)"""
+    loop = asyncio.get_running_loop()
+    executor = _get_bulk_hash_executor() if bulk else _get_hash_executor()
+    return await loop.run_in_executor(executor, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha em thread separada"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_executor(), verify_password, plain_password, hashed_password
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Cria token JWT"""
+    from jose import jwt
+    
     to_encode = data.copy()
     
     if expires_delta:
@@ -39,9 +109,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_token(token: str) -> Optional[dict]:
-    """Decodifica token JWT"""
+    """
+    Decodifica token JWT.
+    Tokens válidos ficam num cache LRU para evitar verificar a assinatura
+    a cada chamada; a expiração é conferida também nos acertos do cache.
+    """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            _token_cache.move_to_end(token)
+            return payload
+        del _token_cache[token]
+        return None
+    
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except JWTError:
         return None
+    
+    if "exp" in payload:
+        _token_cache[token] = payload
+        if len(_token_cache) > settings.token_cache_size:
+            _token_cache.popitem(last=False)
+    
+    return payload
+
+
+def create_device_token(
+    device_id: str,
+    scope: str = DEVICE_SCOPE,
+    viewer_id: Optional[str] = None
+) -> str:
+    """
+    Cria token de curta duração para um dispositivo.
+    Tokens de acesso levam o viewer a quem foram emitidos (claim "viewer").
+    """
+    data = {"sub": device_id, "scope": scope}
+    if viewer_id is not None:
+        data["viewer"] = viewer_id
+    return create_access_token(
+        data,
+        timedelta(minutes=settings.device_token_expire_minutes)
+    )
+
+
+def verify_device_token(
+    token: str,
+    device_id: str,
+    scopes: Iterable[str] = (DEVICE_SCOPE,)
+) -> bool:
+    """Verifica se o token é válido para o dispositivo e escopo informados"""
+    payload = decode_token(token)
+    if payload is None:
+        return False
+    return payload.get("sub") == device_id and payload.get("scope") in scopes
@@ -0,0 +1,59 @@
+"""
+RemotDesk Server - Single-flight
+Chamadas concorrentes com a mesma chave compartilham uma única execução
+em andamento (ex.: centenas de viewers buscando o mesmo host ao mesmo tempo).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Grupos registrados, para métricas
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Deduplica chamadas concorrentes por chave.
+    O resultado não é cacheado: assim que a execução termina, a próxima
+    chamada executa de novo.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Mapeia chave -> execução em andamento
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa fn() ou aguarda a execução já em andamento para a chave"""
+        self.calls += 1
+        future = self.in_flight.get(key)
+
+        if future is None:
+            self.executions += 1
+            # Task própria: o cancelamento de um chamador não afeta os demais
+            future = asyncio.ensure_future(fn())
+            self.in_flight[key] = future
+
+            def forget(done: asyncio.Future):
+                if self.in_flight.get(key) is done:
+                    del self.in_flight[key]
+
+            future.add_done_callback(forget)
+
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        """Quantas chamadas foram deduplicadas"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.calls - self.executions,
+            "in_flight": len(self.in_flight)
+        }
+
+
+def singleflight_stats() -> dict:
+    """Métricas de todos os grupos"""
+    return {name: group.stats() for name, group in _groups.items()}
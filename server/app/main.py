@@ -2,15 +2,23 @@
 RemotDesk Server - Main Application
 Entry point para o servidor FastAPI.
 """
+import asyncio
 import logging
+import signal
+import threading
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from .core.config import get_settings
-from .models import init_db
-from .api import devices_router, sessions_router
-from .websocket import handle_signaling
+from .core.responses import FAST_JSON, FastJSONResponse, static_json
+from .core.loop_monitor import loop_monitor
+from .core.security import warm_up as warm_up_security
+from .models import init_db, dispose_engine, write_coordinator
+from .api import devices_router, sessions_router, history_router, admin_router
+from .websocket import handle_signaling, handle_relay, manager
 
 # Configuração de logging
 logging.basicConfig(
@@ -21,6 +29,49 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+# Task de drain disparada pelo SIGTERM (referência mantida até terminar)
+_drain_tasks: set = set()
+
+
+def _install_drain_on_sigterm():
+    """
+    Intercepta o SIGTERM instalado pelo uvicorn: faz o drain com os
+    WebSockets ainda abertos e só então repassa o sinal ao uvicorn, que
+    fecha as conexões antes de executar o shutdown do lifespan.
+    Um segundo SIGTERM repassa imediatamente (encerramento forçado).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    uvicorn_handler = signal.getsignal(signal.SIGTERM)
+    if not callable(uvicorn_handler):
+        return
+    
+    loop = asyncio.get_running_loop()
+    received = False
+    
+    async def drain_then_exit(sig: int):
+        try:
+            if not manager.draining:
+                await manager.drain(settings.drain_window_seconds, settings.drain_timeout_seconds)
+        finally:
+            uvicorn_handler(sig, None)
+    
+    def start_drain(sig: int):
+        task = loop.create_task(drain_then_exit(sig))
+        _drain_tasks.add(task)
+        task.add_done_callback(_drain_tasks.discard)
+    
+    def handle_sigterm(sig, frame):
+        nonlocal received
+        if received:
+            uvicorn_handler(sig, frame)
+            return
+        received = True
+        logger.info("SIGTERM recebido, iniciando drain")
+        loop.call_soon_threadsafe(start_drain, sig)
+    
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -29,11 +80,19 @@ async def lifespan(app: FastAPI):
     logger.info("Iniciando RemotDesk Server...")
     await init_db()
     logger.info("Banco de dados inicializado")
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    # passlib/jose carregam numa thread, sem segurar o startup nem o loop
+    asyncio.get_running_loop().run_in_executor(None, warm_up_security)
+    _install_drain_on_sigterm()
     
     yield
     
-    # Shutdown
+    # Shutdown (o drain já ocorreu no SIGTERM ou via /api/admin/drain)
     logger.info("Encerrando RemotDesk Server...")
+    await write_coordinator.close()
+    await loop_monitor.stop()
+    await dispose_engine()
 
 
 # Criar aplicação FastAPI
@@ -41,7 +100,8 @@ app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="Servidor de sinalização para RemotDesk - Acesso Remoto",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if FAST_JSON else JSONResponse
 )
 
 # Configurar CORS
@@ -56,35 +116,71 @@ app.add_middleware(
 # Incluir rotas da API
 app.include_router(devices_router, prefix="/api")
 app.include_router(sessions_router, prefix="/api")
+app.include_router(history_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
 
 
 # ============ Endpoints Básicos ============
 
+# Payloads fixos, serializados uma única vez
+ROOT_PAYLOAD = {
+    "app": settings.app_name,
+    "version": settings.app_version,
+    "status": "running"
+}
+ROOT_BODY = static_json(ROOT_PAYLOAD).body
+HEALTHY_BODY = static_json({"status": "healthy"}).body
+DRAINING_BODY = static_json({"status": "draining"}).body
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {
-        "app": settings.app_name,
-        "version": settings.app_version,
-        "status": "running"
-    }
+    return Response(ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check para monitoramento"""
-    return {"status": "healthy"}
+    if manager.draining:
+        # Tira o worker do balanceador durante o drain
+        return Response(DRAINING_BODY, status_code=503, media_type="application/json")
+    return Response(HEALTHY_BODY, media_type="application/json")
 
 
 # ============ WebSocket Signaling ============
 
 @app.websocket("/ws/signal/{device_id}")
-async def websocket_signaling(websocket: WebSocket, device_id: str):
+async def websocket_signaling(
+    websocket: WebSocket,
+    device_id: str,
+    token: Optional[str] = None,
+    resume_token: Optional[str] = None,
+    last_seq: Optional[int] = None
+):
     """
     Endpoint WebSocket para sinalização WebRTC.
-    Cada dispositivo conecta usando seu ID único.
+    Cada dispositivo conecta usando seu ID único e o token
+    recebido no registro (?token=...). Para retomar após uma queda,
+    envie também ?resume_token=...&last_seq=... (recebidos em "welcome").
+    """
+    await handle_signaling(websocket, device_id, token, resume_token, last_seq)
+
+
+@app.websocket("/ws/relay/{session_id}")
+async def websocket_relay(
+    websocket: WebSocket,
+    session_id: str,
+    device_id: str,
+    token: Optional[str] = None
+):
+    """
+    Endpoint WebSocket de relay de dados (fallback do WebRTC).
+    Host e viewer de uma sessão ativa conectam com ?device_id=...&token=...
+    (token do dispositivo, sempre obrigatório) e o servidor repassa os
+    frames entre eles.
     """
-    await handle_signaling(websocket, device_id)
+    await handle_relay(websocket, session_id, device_id, token)
 
 
 # ============ Run Application ============
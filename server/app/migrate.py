@@ -0,0 +1,46 @@
+"""
+RemotDesk Server - CLI de Migrações
+Uso:
+    python -m app.migrate            # aplica migrações pendentes
+    python -m app.migrate --check    # apenas mostra a versão atual
+    python -m app.migrate --target 1 # migra até uma versão específica
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from .models import get_engine, dispose_engine, LATEST_VERSION, run_migrations, get_schema_version
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("app.migrate")
+
+
+async def main(args: argparse.Namespace) -> int:
+    """Executa o comando de migração"""
+    engine = get_engine()
+    try:
+        version = await get_schema_version(engine)
+        logger.info(f"Versão atual do schema: v{version} (aplicação: v{LATEST_VERSION})")
+        
+        if args.check:
+            return 0 if version >= LATEST_VERSION else 1
+        
+        applied = await run_migrations(engine, target=args.target)
+        if applied:
+            logger.info(f"Migrações aplicadas: {applied}")
+        else:
+            logger.info("Schema já está atualizado")
+        return 0
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrações do banco RemotDesk")
+    parser.add_argument("--check", action="store_true", help="apenas verifica a versão")
+    parser.add_argument("--target", type=int, default=LATEST_VERSION, help="versão alvo")
+    sys.exit(asyncio.run(main(parser.parse_args())))
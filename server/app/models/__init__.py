@@ -2,15 +2,27 @@
 RemotDesk Server - Models Module
 """
 from .models import Base, Device, Session, ConnectionLog
-from .database import engine, async_session, init_db, get_db
+from .database import get_engine, dispose_engine, async_session, init_db, get_db, write_coordinator
+from .writer import WriteCoordinator
+from .migrations import LATEST_VERSION, SchemaOutdatedError, run_migrations, get_schema_version
+from .archive import archive_logs, iter_archived_logs
 
 __all__ = [
     "Base",
     "Device", 
     "Session",
     "ConnectionLog",
-    "engine",
+    "get_engine",
+    "dispose_engine",
     "async_session",
     "init_db",
-    "get_db"
+    "get_db",
+    "write_coordinator",
+    "WriteCoordinator",
+    "LATEST_VERSION",
+    "SchemaOutdatedError",
+    "run_migrations",
+    "get_schema_version",
+    "archive_logs",
+    "iter_archived_logs"
 ]
@@ -0,0 +1,219 @@
+"""
+RemotDesk Server - Arquivamento de Logs
+Move logs de conexão antigos da tabela quente para arquivos comprimidos,
+particionados por data (date=YYYY-MM-DD), e permite ler esses arquivos
+com filtro de período sem carregá-los inteiros em memória.
+"""
+import asyncio
+import gzip
+import importlib.util
+import json
+import logging
+import os
+from datetime import date, datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select, delete
+
+from .database import async_session
+from .models import ConnectionLog
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "parquet")
+
+COLUMNS = (
+    "id", "session_id", "host_device_id", "viewer_device_id",
+    "action", "details", "timestamp"
+)
+
+
+def parquet_available() -> bool:
+    """Indica se o pyarrow está instalado (sem importá-lo)"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _row_to_record(log: ConnectionLog) -> dict:
+    """Converte um log em dicionário serializável"""
+    return {column: getattr(log, column) for column in COLUMNS}
+
+
+def _partition_dir(archive_dir: Path, day: date) -> Path:
+    """Diretório da partição de um dia"""
+    return archive_dir / f"date={day.isoformat()}"
+
+
+# ============ Escrita ============
+
+def _write_ndjson(path: Path, records: List[dict]):
+    """Grava registros em NDJSON com gzip"""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            record = dict(record, timestamp=record["timestamp"].isoformat())
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+
+
+def _write_parquet(path: Path, records: List[dict]):
+    """Grava registros em Parquet (compressão zstd)"""
+    # pyarrow é pesado e opcional: importado só quando usado
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("session_id", pa.string()),
+        ("host_device_id", pa.string()),
+        ("viewer_device_id", pa.string()),
+        ("action", pa.string()),
+        ("details", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+    ])
+    table = pa.Table.from_pylist(records, schema=schema)
+    pq.write_table(table, path, compression="zstd")
+
+
+def _write_partition(archive_dir: Path, day: date, records: List[dict], fmt: str) -> Path:
+    """
+    Grava um bloco de registros de um dia.
+    O nome do arquivo é derivado dos ids, então reexecutar após uma falha
+    sobrescreve o mesmo arquivo em vez de duplicar dados.
+    """
+    partition = _partition_dir(archive_dir, day)
+    partition.mkdir(parents=True, exist_ok=True)
+
+    suffix = ".ndjson.gz" if fmt == "ndjson" else ".parquet"
+    ids = [record["id"] for record in records]
+    path = partition / f"connection_logs-{min(ids)}-{max(ids)}{suffix}"
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    if fmt == "ndjson":
+        _write_ndjson(tmp_path, records)
+    else:
+        _write_parquet(tmp_path, records)
+
+    # Garante que o arquivo está em disco antes de apagar as linhas do banco
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+async def archive_logs(
+    before: datetime,
+    archive_dir: str,
+    fmt: str = "ndjson",
+    chunk_size: int = 5000
+) -> Dict[str, int]:
+    """
+    Exporta logs com timestamp anterior a `before` e os remove da tabela.
+    Processa em blocos: cada bloco é gravado e sincronizado em disco antes
+    de ser apagado do banco.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato inválido: {fmt}")
+    if fmt == "parquet" and not parquet_available():
+        raise RuntimeError("Formato parquet requer o pacote pyarrow")
+
+    root = Path(archive_dir)
+    stats = {"rows": 0, "files": 0}
+
+    while True:
+        async with async_session() as db:
+            result = await db.execute(
+                select(ConnectionLog)
+                .where(ConnectionLog.timestamp < before)
+                .order_by(ConnectionLog.timestamp, ConnectionLog.id)
+                .limit(chunk_size)
+            )
+            records = [_row_to_record(log) for log in result.scalars()]
+
+        if not records:
+            break
+
+        for day, group in groupby(records, key=lambda r: r["timestamp"].date()):
+            path = await asyncio.to_thread(_write_partition, root, day, list(group), fmt)
+            stats["files"] += 1
+            logger.info(f"Arquivo gravado: {path}")
+
+        async with async_session() as db:
+            await db.execute(
+                delete(ConnectionLog).where(
+                    ConnectionLog.id.in_([record["id"] for record in records])
+                )
+            )
+            await db.commit()
+
+        stats["rows"] += len(records)
+
+    return stats
+
+
+# ============ Leitura ============
+
+def _iter_ndjson(path: Path) -> Iterator[dict]:
+    """Lê um arquivo NDJSON gzip linha a linha"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            yield record
+
+
+def _iter_parquet(path: Path, batch_size: int = 10000) -> Iterator[dict]:
+    """Lê um arquivo Parquet em lotes"""
+    import pyarrow.parquet as pq
+    
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def _file_order(path: Path):
+    """Ordena arquivos de uma partição pelo menor id contido"""
+    try:
+        return (0, int(path.name.split("-")[1]), path.name)
+    except (IndexError, ValueError):
+        return (1, 0, path.name)
+
+
+def iter_archived_logs(
+    archive_dir: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Iterator[dict]:
+    """
+    Percorre os logs arquivados no período [since, until).
+    Partições fora do período são ignoradas sem abrir os arquivos.
+    """
+    root = Path(archive_dir)
+    if not root.is_dir():
+        return
+
+    for partition in sorted(root.glob("date=*")):
+        day = date.fromisoformat(partition.name.split("=", 1)[1])
+        if since and day < since.date():
+            continue
+        if until and day > until.date():
+            continue
+
+        for path in sorted(partition.iterdir(), key=_file_order):
+            if path.name.endswith(".ndjson.gz"):
+                records = _iter_ndjson(path)
+            elif path.name.endswith(".parquet"):
+                if not parquet_available():
+                    logger.warning(f"Ignorando {path}: pyarrow não instalado")
+                    continue
+                records = _iter_parquet(path)
+            else:
+                continue
+
+            for record in records:
+                timestamp = record["timestamp"]
+                if since and timestamp < since:
+                    continue
+                if until and timestamp >= until:
+                    continue
+                yield record
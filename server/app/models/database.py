@@ -1,31 +1,92 @@
 """
 RemotDesk Server - Database Connection
+O engine é criado no primeiro uso (init_db no lifespan ou primeira
+sessão), não na importação, para não atrasar o cold start dos workers.
 """
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from .models import Base
+import logging
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from .migrations import (
+    LATEST_VERSION, SchemaOutdatedError, get_schema_version, run_migrations
+)
+from .writer import WriteCoordinator
 from ..core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
 settings = get_settings()
 
-# Engine async
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True
-)
+# Engine async e session factory, criados sob demanda
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    """Engine async (criado no primeiro uso)"""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.database_url,
+            echo=settings.debug,
+            future=True
+        )
+    return _engine
+
+
+def async_session() -> AsyncSession:
+    """Abre uma sessão do banco"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+    return _session_factory()
+
+
+async def dispose_engine():
+    """Fecha as conexões do engine, se ele chegou a ser criado"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
 
-# Session factory
-async_session = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
+# Escritor único com group commit para atualizações de estado
+write_coordinator = WriteCoordinator(
+    async_session,
+    max_batch=settings.write_batch_max,
+    batch_window=settings.write_batch_window_ms / 1000
 )
 
 
 async def init_db():
-    """Inicializa o banco de dados criando as tabelas"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    Verifica a versão do schema no startup.
+    As migrações devem rodar antes dos workers (python -m app.migrate);
+    com auto_migrate habilitado, as pendentes são aplicadas aqui.
+    """
+    engine = get_engine()
+    version = await get_schema_version(engine)
+    
+    if version == LATEST_VERSION:
+        return
+    
+    if version > LATEST_VERSION:
+        logger.warning(
+            f"Schema do banco (v{version}) é mais novo que a aplicação (v{LATEST_VERSION})"
+        )
+        return
+    
+    if not settings.auto_migrate:
+        raise SchemaOutdatedError(
+            f"Schema do banco na v{version}, esperado v{LATEST_VERSION}. "
+            "Execute: python -m app.migrate"
+        )
+    
+    applied = await run_migrations(engine)
+    logger.info(f"Migrações aplicadas: {applied}")
 
 
 async def get_db() -> AsyncSession:
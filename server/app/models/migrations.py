@@ -0,0 +1,157 @@
+"""
+RemotDesk Server - Migrações do Schema
+Sistema de migrações versionadas. Cada migração recebe uma conexão síncrona
+(via run_sync) e roda em sua própria transação junto com o registro da versão.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    Column, String, Boolean, DateTime, Integer, Text, MetaData, Table, text
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_migrations"
+
+
+class Migration(NamedTuple):
+    """Migração versionada do schema"""
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+class SchemaOutdatedError(RuntimeError):
+    """Schema do banco está atrás da versão esperada pela aplicação"""
+
+
+# ============ Migrações ============
+
+def _v1_initial_schema(conn: Connection):
+    """Tabelas iniciais (snapshot congelado dos modelos originais)"""
+    metadata = MetaData()
+    Table(
+        "devices", metadata,
+        Column("id", String(36), primary_key=True),
+        Column("name", String(100), nullable=False),
+        Column("device_type", String(50)),
+        Column("os_info", String(100), nullable=True),
+        Column("is_online", Boolean),
+        Column("last_seen", DateTime),
+        Column("created_at", DateTime),
+        Column("access_password_hash", String(255), nullable=True),
+        Column("unattended_password_hash", String(255), nullable=True),
+    )
+    Table(
+        "sessions", metadata,
+        Column("id", String(36), primary_key=True),
+        Column("host_device_id", String(36), nullable=False),
+        Column("viewer_device_id", String(36), nullable=False),
+        Column("status", String(20)),
+        Column("started_at", DateTime, nullable=True),
+        Column("ended_at", DateTime, nullable=True),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "connection_logs", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("session_id", String(36), nullable=False),
+        Column("host_device_id", String(36), nullable=False),
+        Column("viewer_device_id", String(36), nullable=False),
+        Column("action", String(50), nullable=False),
+        Column("details", Text, nullable=True),
+        Column("timestamp", DateTime),
+    )
+    # checkfirst: bancos criados antes das migrações já possuem as tabelas
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _v2_history_indexes(conn: Connection):
+    """Índices para consultas de histórico por dispositivo e período"""
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_sessions_host_created "
+        "ON sessions (host_device_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_sessions_viewer_created "
+        "ON sessions (viewer_device_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_connection_logs_host_ts "
+        "ON connection_logs (host_device_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_connection_logs_viewer_ts "
+        "ON connection_logs (viewer_device_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_connection_logs_ts "
+        "ON connection_logs (timestamp)",
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+# Lista ordenada de migrações. Nunca altere uma migração já publicada:
+# adicione uma nova versão no final.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "schema inicial", _v1_initial_schema),
+    Migration(2, "índices de histórico", _v2_history_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ============ Controle de versão ============
+
+def _ensure_version_table(conn: Connection):
+    """Cria a tabela de controle de versões se necessário"""
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def _current_version(conn: Connection) -> int:
+    """Retorna a versão atual do schema (0 se nunca migrado)"""
+    if not conn.dialect.has_table(conn, VERSION_TABLE):
+        return 0
+    result = conn.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}"))
+    return result.scalar() or 0
+
+
+async def get_schema_version(engine: AsyncEngine) -> int:
+    """Lê a versão do schema sem aplicar nada (caminho rápido do startup)"""
+    async with engine.connect() as conn:
+        return await conn.run_sync(_current_version)
+
+
+async def run_migrations(engine: AsyncEngine, target: int = LATEST_VERSION) -> List[int]:
+    """
+    Aplica as migrações pendentes até a versão alvo.
+    Retorna a lista de versões aplicadas.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(_ensure_version_table)
+        current = await conn.run_sync(_current_version)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current or migration.version > target:
+            continue
+
+        logger.info(f"Aplicando migração {migration.version}: {migration.description}")
+        async with engine.begin() as conn:
+            await conn.run_sync(migration.upgrade)
+            await conn.execute(
+                text(
+                    f"INSERT INTO {VERSION_TABLE} (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.utcnow(),
+                }
+            )
+        applied.append(migration.version)
+
+    return applied
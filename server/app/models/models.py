@@ -2,7 +2,7 @@
 RemotDesk Server - Modelos do Banco de Dados
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -31,6 +31,10 @@ class Device(Base):
 class Session(Base):
     """Modelo de sessão de conexão"""
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_host_created", "host_device_id", "created_at"),
+        Index("ix_sessions_viewer_created", "viewer_device_id", "created_at"),
+    )
     
     id = Column(String(36), primary_key=True)
     host_device_id = Column(String(36), nullable=False)
@@ -47,6 +51,11 @@ class Session(Base):
 class ConnectionLog(Base):
     """Log de conexões para auditoria"""
     __tablename__ = "connection_logs"
+    __table_args__ = (
+        Index("ix_connection_logs_host_ts", "host_device_id", "timestamp"),
+        Index("ix_connection_logs_viewer_ts", "viewer_device_id", "timestamp"),
+        Index("ix_connection_logs_ts", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(36), nullable=False)
@@ -0,0 +1,143 @@
+"""
+RemotDesk Server - Coordenador de Escritas
+Todas as atualizações de estado de dispositivos/sessões passam por uma
+única task escritora, que agrupa as operações concorrentes numa só
+transação (group commit): um commit/fsync para o lote inteiro.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Operação de escrita: recebe a sessão do lote e retorna o resultado do chamador.
+# Deve validar tudo (e levantar exceções) antes de alterar qualquer objeto.
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+_Item = Tuple[WriteOperation, asyncio.Future]
+
+
+class WriteCoordinator:
+    """
+    Fila de escritas com um único escritor.
+    Cada chamador recebe o resultado (ou a exceção) da sua operação
+    quando o commit do lote foi concluído.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_batch: int = 100,
+        batch_window: float = 0.0
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        # Métricas
+        self.batches = 0
+        self.writes = 0
+
+    def _ensure_started(self):
+        """Inicia a task escritora no primeiro uso"""
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """Enfileira uma operação e aguarda o commit do lote que a contém"""
+        if self.closing:
+            raise RuntimeError("Coordenador de escritas encerrado")
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((operation, future))
+        return await future
+
+    async def close(self):
+        """Conclui as escritas pendentes e encerra a task escritora"""
+        self.closing = True
+        if self.task is None or self.task.done():
+            return
+        self.queue.put_nowait(None)
+        await self.task
+
+    async def _run(self):
+        """Loop do escritor: junta o que estiver na fila e faz um commit por lote"""
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+
+            if self.batch_window:
+                await asyncio.sleep(self.batch_window)
+
+            batch = [item]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._commit_batch(batch)
+            except Exception as e:
+                logger.error(f"Erro no lote de escritas: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _commit_batch(self, batch: List[_Item]):
+        """Executa as operações numa transação e resolve os futures após o commit"""
+        done = []
+        async with self.session_factory() as db:
+            for operation, future in batch:
+                if future.done():
+                    # Chamador cancelado antes da execução
+                    continue
+                try:
+                    done.append((operation, future, await operation(db)))
+                except Exception as e:
+                    future.set_exception(e)
+
+            if not done:
+                return
+
+            try:
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                if len(done) == 1:
+                    done[0][1].set_exception(e)
+                    return
+                # Isola a operação problemática refazendo uma a uma
+                logger.warning(f"Commit do lote falhou ({e}), refazendo individualmente")
+                retry = True
+            else:
+                retry = False
+
+        if retry:
+            for operation, future, _ in done:
+                await self._commit_batch([(operation, future)])
+            return
+
+        self.batches += 1
+        self.writes += len(done)
+        for _, future, result in done:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Métricas de agrupamento"""
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "writes_per_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+            "queued": self.queue.qsize() if self.queue else 0
+        }
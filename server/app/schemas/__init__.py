@@ -3,10 +3,16 @@ RemotDesk Server - Schemas Module
 """
 from .schemas import (
     DeviceRegister,
+    DeviceBulkRegister,
     DeviceResponse,
+    DeviceRegisterResponse,
+    DeviceToken,
     DeviceUpdate,
     SessionCreate,
     SessionResponse,
+    SessionPage,
+    ConnectionLogResponse,
+    ConnectionLogPage,
     SignalMessage,
     ConnectionRequest,
     ConnectionResponse,
@@ -17,10 +23,16 @@ from .schemas import (
 
 __all__ = [
     "DeviceRegister",
+    "DeviceBulkRegister",
     "DeviceResponse",
+    "DeviceRegisterResponse",
+    "DeviceToken",
     "DeviceUpdate",
     "SessionCreate",
     "SessionResponse",
+    "SessionPage",
+    "ConnectionLogResponse",
+    "ConnectionLogPage",
     "SignalMessage",
     "ConnectionRequest",
     "ConnectionResponse",
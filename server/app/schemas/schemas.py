@@ -5,6 +5,10 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from ..core.config import get_settings
+
+settings = get_settings()
+
 
 # ============ Device Schemas ============
 
@@ -16,6 +20,11 @@ class DeviceRegister(BaseModel):
     access_password: Optional[str] = None
 
 
+class DeviceBulkRegister(BaseModel):
+    """Schema para registro de vários dispositivos de uma vez"""
+    devices: list[DeviceRegister] = Field(..., min_length=1, max_length=settings.bulk_register_max)
+
+
 class DeviceResponse(BaseModel):
     """Schema de resposta para dispositivo"""
     id: str
@@ -30,6 +39,19 @@ class DeviceResponse(BaseModel):
         from_attributes = True
 
 
+class DeviceRegisterResponse(DeviceResponse):
+    """Schema de resposta do registro, com token do dispositivo"""
+    access_token: str
+    token_type: str = "bearer"
+
+
+class DeviceToken(BaseModel):
+    """Schema de token de dispositivo"""
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
 class DeviceUpdate(BaseModel):
     """Schema para atualização de dispositivo"""
     name: Optional[str] = None
@@ -60,6 +82,34 @@ class SessionResponse(BaseModel):
         from_attributes = True
 
 
+class SessionPage(BaseModel):
+    """Página de sessões com cursor para a próxima página"""
+    items: list[SessionResponse]
+    next_cursor: Optional[str] = None
+
+
+# ============ Connection Log Schemas ============
+
+class ConnectionLogResponse(BaseModel):
+    """Schema de resposta para log de conexão"""
+    id: int
+    session_id: str
+    host_device_id: str
+    viewer_device_id: str
+    action: str
+    details: Optional[str]
+    timestamp: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ConnectionLogPage(BaseModel):
+    """Página de logs de conexão com cursor para a próxima página"""
+    items: list[ConnectionLogResponse]
+    next_cursor: Optional[str] = None
+
+
 # ============ WebSocket Signaling Schemas ============
 
 class SignalMessage(BaseModel):
@@ -2,5 +2,15 @@
 RemotDesk Server - WebSocket Module
 """
 from .signaling import manager, handle_signaling, ConnectionManager
+from .mailbox import Mailbox
+from .relay import relay_manager, handle_relay, RelayManager
 
-__all__ = ["manager", "handle_signaling", "ConnectionManager"]
+__all__ = [
+    "manager",
+    "handle_signaling",
+    "ConnectionManager",
+    "Mailbox",
+    "relay_manager",
+    "handle_relay",
+    "RelayManager"
+]
@@ -0,0 +1,129 @@
+"""
+RemotDesk Server - Mailbox de Sinalização
+Guarda mensagens destinadas a dispositivos momentaneamente offline
+(ex.: reconexão de 1-2 s) para entregá-las em ordem quando voltarem.
+"""
+import json
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    size: int
+    message: dict
+
+
+class Mailbox:
+    """
+    Filas por dispositivo com TTL e limites de memória.
+    Quando um limite é atingido a mensagem nova é descartada, preservando
+    a ordem das que já estão na fila.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_messages: int,
+        max_bytes_per_device: int,
+        max_total_bytes: int
+    ):
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.max_bytes_per_device = max_bytes_per_device
+        self.max_total_bytes = max_total_bytes
+        # Mapeia device_id -> fila de mensagens pendentes
+        self.queues: Dict[str, Deque[_Entry]] = {}
+        self.device_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+
+    def _expire(self, device_id: str, now: float):
+        """
+        Remove as mensagens expiradas do início da fila.
+        Com TTLs diferentes por mensagem a fila não é ordenada por expiração:
+        expiradas atrás de uma válida saem só em pop_all.
+        """
+        queue = self.queues.get(device_id)
+        if queue is None:
+            return
+        while queue and queue[0].expires_at <= now:
+            self._release(device_id, queue.popleft())
+        if not queue:
+            del self.queues[device_id]
+            del self.device_bytes[device_id]
+
+    def _release(self, device_id: str, entry: _Entry):
+        """Atualiza os contadores de memória ao remover uma mensagem"""
+        self.device_bytes[device_id] -= entry.size
+        self.total_bytes -= entry.size
+
+    def purge(self):
+        """Remove mensagens expiradas de todos os dispositivos"""
+        now = time.monotonic()
+        for device_id in list(self.queues):
+            self._expire(device_id, now)
+
+    def put(self, device_id: str, message: dict, ttl: Optional[float] = None) -> bool:
+        """
+        Enfileira uma mensagem (com TTL próprio, se informado).
+        Retorna False se foi descartada.
+        """
+        now = time.monotonic()
+        self._expire(device_id, now)
+
+        size = len(json.dumps(message, default=str))
+        if self.total_bytes + size > self.max_total_bytes:
+            self.purge()
+
+        queue = self.queues.get(device_id, ())
+        device_bytes = self.device_bytes.get(device_id, 0)
+        if (
+            len(queue) >= self.max_messages
+            or device_bytes + size > self.max_bytes_per_device
+            or self.total_bytes + size > self.max_total_bytes
+        ):
+            logger.warning(f"Mailbox cheia, mensagem descartada para {device_id}: {message.get('type')}")
+            return False
+
+        if device_id not in self.queues:
+            self.queues[device_id] = deque()
+            self.device_bytes[device_id] = 0
+        self.queues[device_id].append(_Entry(now + (ttl or self.ttl), size, message))
+        self.device_bytes[device_id] += size
+        self.total_bytes += size
+        return True
+
+    def requeue(self, device_id: str, messages: List[dict], ttl: Optional[float] = None):
+        """
+        Devolve ao início da fila mensagens retiradas que não puderam ser
+        entregues, antes das que chegaram nesse meio tempo.
+        Já foram aceitas uma vez, então não passam pelos limites de novo.
+        """
+        if not messages:
+            return
+        now = time.monotonic()
+        self._expire(device_id, now)
+        queue = self.queues.setdefault(device_id, deque())
+        self.device_bytes.setdefault(device_id, 0)
+        expires_at = now + (ttl or self.ttl)
+        for message in reversed(messages):
+            size = len(json.dumps(message, default=str))
+            queue.appendleft(_Entry(expires_at, size, message))
+            self.device_bytes[device_id] += size
+            self.total_bytes += size
+
+    def pop_all(self, device_id: str) -> List[dict]:
+        """Retira todas as mensagens válidas do dispositivo, em ordem"""
+        queue = self.queues.pop(device_id, None)
+        if queue is None:
+            return []
+        self.total_bytes -= self.device_bytes.pop(device_id)
+        now = time.monotonic()
+        return [entry.message for entry in queue if entry.expires_at > now]
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
@@ -0,0 +1,223 @@
+"""
+RemotDesk Server - Relay de Dados via WebSocket
+Fallback quando a conexão WebRTC peer-to-peer falha: host e viewer
+conectam em /ws/relay/{session_id} e o servidor repassa os frames entre
+eles, com controle de fluxo e contabilização de banda por sessão.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import WebSocket, status
+from sqlalchemy import select
+
+from ..core.config import get_settings
+from ..models import async_session, Session
+from .signaling import manager, authorize_connection
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+ROLES = ("host", "viewer")
+
+
+class RateLimiter:
+    """Token bucket em bytes/s (0 = sem limite)"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    async def consume(self, size: int):
+        """Aguarda até haver banda disponível para `size` bytes"""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= size
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class RelayChannel:
+    """Canal de relay de uma sessão (um host e um viewer)"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # Mapeia papel (host/viewer) -> WebSocket
+        self.peers: Dict[str, WebSocket] = {}
+        self.paired = asyncio.Event()
+        self.limiter = RateLimiter(settings.relay_max_bytes_per_second)
+        self.created_at = time.monotonic()
+        # Bytes e frames encaminhados por papel de origem
+        self.bytes = {role: 0 for role in ROLES}
+        self.frames = {role: 0 for role in ROLES}
+
+    def stats(self) -> dict:
+        """Resumo de uso do canal"""
+        elapsed = time.monotonic() - self.created_at
+        total = sum(self.bytes.values())
+        return {
+            "session_id": self.session_id,
+            "peers": sorted(self.peers),
+            "bytes": dict(self.bytes),
+            "frames": dict(self.frames),
+            "duration_seconds": round(elapsed, 3),
+            "bytes_per_second": round(total / elapsed, 1) if elapsed else 0.0
+        }
+
+
+class RelayManager:
+    """Canais de relay ativos e totais do worker"""
+
+    def __init__(self):
+        # Mapeia session_id -> canal
+        self.channels: Dict[str, RelayChannel] = {}
+        self.total_bytes = 0
+        self.total_frames = 0
+        self.started_at = time.monotonic()
+        self.cpu_started_at = time.process_time()
+
+    def join(self, session_id: str, role: str, websocket: WebSocket) -> RelayChannel:
+        """Registra o peer no canal da sessão"""
+        channel = self.channels.get(session_id)
+        if channel is None:
+            channel = self.channels[session_id] = RelayChannel(session_id)
+        channel.peers[role] = websocket
+        if len(channel.peers) == len(ROLES):
+            channel.paired.set()
+        return channel
+
+    def leave(self, channel: RelayChannel, role: str, websocket: WebSocket):
+        """Remove o peer; o canal some quando ambos saem"""
+        if channel.peers.get(role) is websocket:
+            del channel.peers[role]
+            channel.paired.clear()
+        if not channel.peers and self.channels.get(channel.session_id) is channel:
+            del self.channels[channel.session_id]
+            logger.info(f"Relay encerrado: {channel.stats()}")
+
+    def record(self, channel: RelayChannel, role: str, size: int):
+        """Contabiliza um frame encaminhado"""
+        channel.bytes[role] += size
+        channel.frames[role] += 1
+        self.total_bytes += size
+        self.total_frames += 1
+
+    def stats(self) -> dict:
+        """Throughput do worker (um worker por core)"""
+        elapsed = time.monotonic() - self.started_at
+        cpu = time.process_time() - self.cpu_started_at
+        return {
+            "active_sessions": len(self.channels),
+            "total_bytes": self.total_bytes,
+            "total_frames": self.total_frames,
+            "bytes_per_second": round(self.total_bytes / elapsed, 1) if elapsed else 0.0,
+            "cpu_seconds": round(cpu, 3),
+            "bytes_per_cpu_second": round(self.total_bytes / cpu, 1) if cpu else 0.0,
+            "sessions": [channel.stats() for channel in self.channels.values()]
+        }
+
+
+# Instância global do relay
+relay_manager = RelayManager()
+
+
+async def _session_role(session_id: str, device_id: str) -> Optional[str]:
+    """Papel do dispositivo na sessão ativa, ou None se não participa"""
+    async with async_session() as db:
+        result = await db.execute(select(Session).where(Session.id == session_id))
+        session = result.scalar_one_or_none()
+
+    if session is None or session.status != "active":
+        return None
+    if device_id == session.host_device_id:
+        return "host"
+    if device_id == session.viewer_device_id:
+        return "viewer"
+    return None
+
+
+async def handle_relay(
+    websocket: WebSocket,
+    session_id: str,
+    device_id: str,
+    token: Optional[str] = None
+):
+    """
+    Repassa frames entre host e viewer de uma sessão.
+    Frames binários são encaminhados sem decodificação; o próximo frame só
+    é lido depois que o anterior foi entregue ao peer (backpressure).
+    """
+    # Endpoint sem clientes legados: token sempre obrigatório
+    if not authorize_connection(device_id, token, required=True):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    if manager.draining:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    role = await _session_role(session_id, device_id)
+    if role is None:
+        logger.warning(f"Relay recusado: {device_id} não participa da sessão {session_id}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    previous = relay_manager.channels.get(session_id)
+    previous = previous.peers.get(role) if previous else None
+    channel = relay_manager.join(session_id, role, websocket)
+    if previous is not None:
+        # Reconexão do mesmo papel substitui o socket antigo
+        try:
+            await previous.close()
+        except Exception:
+            pass
+    peer_role = "viewer" if role == "host" else "host"
+    logger.info(f"Relay: {device_id} ({role}) entrou na sessão {session_id}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            data = message.get("bytes")
+            text = message.get("text") if data is None else None
+            size = len(data) if data is not None else len(text or "")
+            if size > settings.relay_max_frame_bytes:
+                await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG)
+                break
+
+            await channel.limiter.consume(size)
+
+            while True:
+                # Aguarda o peer (entrada inicial ou reconexão)
+                if not channel.paired.is_set():
+                    await asyncio.wait_for(channel.paired.wait(), settings.relay_pair_timeout_seconds)
+                peer = channel.peers[peer_role]
+                try:
+                    if data is not None:
+                        await peer.send_bytes(data)
+                    else:
+                        await peer.send_text(text)
+                    break
+                except Exception as e:
+                    # Peer caiu durante o envio: aguarda a reconexão e reenvia o frame
+                    logger.info(f"Relay: falha ao enviar para {peer_role} na sessão {session_id}: {e}")
+                    if channel.peers.get(peer_role) is peer:
+                        channel.paired.clear()
+            relay_manager.record(channel, role, size)
+
+    except asyncio.TimeoutError:
+        logger.info(f"Relay: peer não conectou a tempo na sessão {session_id}")
+        await websocket.close(code=status.WS_1001_GOING_AWAY)
+    except Exception as e:
+        logger.error(f"Erro no relay {session_id} ({device_id}): {e}")
+    finally:
+        relay_manager.leave(channel, role, websocket)
@@ -0,0 +1,131 @@
+"""
+RemotDesk Server - Retomada de Conexões WebSocket
+Estado por dispositivo que permite retomar a conexão após uma queda:
+token de retomada, números de sequência e buffer de mensagens não
+confirmadas (ack) pelo cliente.
+"""
+import hmac
+import json
+import secrets
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class ResumeBudget:
+    """Limite global de memória dos buffers de retomada do worker"""
+
+    def __init__(self, max_total_bytes: int):
+        self.max_total_bytes = max_total_bytes
+        self.total_bytes = 0
+
+
+class ResumeState:
+    """
+    Estado de retomada de um dispositivo.
+    Cada mensagem enviada recebe um "seq" crescente. Depois que o cliente
+    passa a confirmar o recebimento com {"type": "ack", "seq": n}, as
+    mensagens ficam no buffer até serem confirmadas; clientes que nunca
+    enviam ack não ocupam memória (e não podem retomar).
+    """
+
+    def __init__(self, buffer_size: int, max_bytes: int, budget: ResumeBudget):
+        self.resume_token = secrets.token_urlsafe(24)
+        self.last_seq = 0
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.budget = budget
+        # Cliente já enviou algum ack (opt-in do buffer)
+        self.acking = False
+        # Fila de (seq, tamanho, mensagem) enviadas e ainda não confirmadas
+        self.unacked: Deque[Tuple[int, int, dict]] = deque()
+        self.buffered_bytes = 0
+        self._last_stamped: Optional[dict] = None
+        # Timer de limpeza agendado enquanto o dispositivo está desconectado
+        self.cleanup_handle = None
+
+    def matches(self, token: Optional[str]) -> bool:
+        """Compara o token de retomada em tempo constante"""
+        return bool(token) and hmac.compare_digest(token, self.resume_token)
+
+    def _drop_oldest(self):
+        """Remove a mensagem mais antiga do buffer"""
+        _, size, _ = self.unacked.popleft()
+        self.buffered_bytes -= size
+        self.budget.total_bytes -= size
+
+    def _buffer(self, seq: int, message: dict):
+        """
+        Guarda a mensagem respeitando os limites. Sem espaço, descarta as
+        mais antigas; o buffer continua contíguo (as retomadas que dependiam
+        delas passam a ser recusadas).
+        """
+        size = len(json.dumps(message, default=str))
+        while self.unacked and (
+            len(self.unacked) >= self.buffer_size
+            or self.buffered_bytes + size > self.max_bytes
+            or self.budget.total_bytes + size > self.budget.max_total_bytes
+        ):
+            self._drop_oldest()
+
+        if (
+            size > self.max_bytes
+            or self.budget.total_bytes + size > self.budget.max_total_bytes
+        ):
+            # Não cabe nem com o buffer vazio: buffer vazio e seq avançado
+            # impedem retomadas a partir de antes desta mensagem
+            return
+
+        self.unacked.append((seq, size, message))
+        self.buffered_bytes += size
+        self.budget.total_bytes += size
+
+    def stamp(self, message: dict) -> dict:
+        """Retorna uma cópia da mensagem com o próximo seq (e a guarda no buffer)"""
+        self.last_seq += 1
+        stamped = {**message, "seq": self.last_seq}
+        if self.acking:
+            self._buffer(self.last_seq, stamped)
+        self._last_stamped = stamped
+        return stamped
+
+    def unstamp(self, message: dict):
+        """Desfaz o último stamp (mensagem que não chegou a ser enviada)"""
+        if self._last_stamped is not message:
+            return
+        if self.unacked and self.unacked[-1][2] is message:
+            _, size, _ = self.unacked.pop()
+            self.buffered_bytes -= size
+            self.budget.total_bytes -= size
+        self.last_seq -= 1
+        self._last_stamped = None
+
+    def ack(self, seq: int):
+        """Descarta as mensagens confirmadas pelo cliente"""
+        self.acking = True
+        while self.unacked and self.unacked[0][0] <= seq:
+            self._drop_oldest()
+
+    def replay_after(self, seq: int) -> Optional[List[dict]]:
+        """
+        Mensagens com seq maior que o último recebido pelo cliente.
+        Retorna None se parte delas já saiu do buffer (retomada impossível).
+        """
+        if seq > self.last_seq:
+            return None
+        self.ack(seq)
+        if self.unacked and self.unacked[0][0] != seq + 1:
+            return None
+        if not self.unacked and seq != self.last_seq:
+            return None
+        return [message for _, _, message in self.unacked]
+
+    def release(self):
+        """Libera a memória do buffer (estado descartado)"""
+        while self.unacked:
+            self._drop_oldest()
+
+    def cancel_cleanup(self):
+        """Cancela a limpeza agendada (dispositivo reconectou)"""
+        if self.cleanup_handle is not None:
+            self.cleanup_handle.cancel()
+            self.cleanup_handle = None
@@ -2,14 +2,24 @@
 RemotDesk Server - WebSocket Signaling Server
 Gerencia a sinalização WebRTC entre dispositivos.
 """
+import asyncio
 import json
 import logging
-from typing import Dict, Set
-from fastapi import WebSocket, WebSocketDisconnect
+import random
+from typing import Dict, Optional, Set
+from fastapi import WebSocket, WebSocketDisconnect, status
 from datetime import datetime
 
+from ..core.config import get_settings
+from ..core.security import verify_device_token
+from ..core.ice import ice_provider
+from .mailbox import Mailbox
+from .resume import ResumeBudget, ResumeState
+
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 
 class ConnectionManager:
     """
@@ -22,36 +32,245 @@ class ConnectionManager:
         self.active_connections: Dict[str, WebSocket] = {}
         # Mapeia session_id -> set of device_ids
         self.sessions: Dict[str, Set[str]] = {}
+        # Mensagens aguardando dispositivos em reconexão
+        self.mailbox = Mailbox(
+            ttl=settings.mailbox_ttl_seconds,
+            max_messages=settings.mailbox_max_messages,
+            max_bytes_per_device=settings.mailbox_max_bytes_per_device,
+            max_total_bytes=settings.mailbox_max_total_bytes
+        )
+        # Dispositivos entregando a mailbox; novas mensagens entram na fila
+        # para não ultrapassar as pendentes
+        self.flushing: Set[str] = set()
+        # Mapeia device_id -> estado de retomada (token, seq, buffer)
+        self.states: Dict[str, ResumeState] = {}
+        self.resume_budget = ResumeBudget(settings.resume_buffer_max_total_bytes)
+        # Modo drain (deploy): recusa novas conexões
+        self.draining = False
+        # Mensagens sendo processadas/encaminhadas neste momento
+        self.in_flight = 0
     
-    async def connect(self, websocket: WebSocket, device_id: str):
-        """Aceita conexão WebSocket e registra o dispositivo"""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        device_id: str,
+        resume_token: Optional[str] = None,
+        last_seq: Optional[int] = None
+    ):
+        """
+        Aceita conexão WebSocket e registra o dispositivo.
+        Com resume_token/last_seq válidos, retoma o estado anterior e reenvia
+        as mensagens que o cliente não recebeu.
+        """
         await websocket.accept()
+        
+        state = self.states.get(device_id)
+        replay = None
+        if state is not None and state.matches(resume_token) and last_seq is not None:
+            replay = state.replay_after(last_seq)
+        
+        if state is not None:
+            state.cancel_cleanup()
+        if replay is None:
+            if state is not None:
+                state.release()
+            state = ResumeState(
+                settings.resume_buffer_size,
+                settings.resume_buffer_max_bytes,
+                self.resume_budget
+            )
+            self.states[device_id] = state
+        
+        # Uma conexão anterior ainda aberta é substituída pela nova
+        previous = self.active_connections.get(device_id)
         self.active_connections[device_id] = websocket
-        logger.info(f"Dispositivo conectado: {device_id}")
+        if previous is not None and previous is not websocket:
+            try:
+                await previous.close()
+            except Exception:
+                pass
+        
+        resumed = replay is not None
+        logger.info(f"Dispositivo {'reconectado' if resumed else 'conectado'}: {device_id}")
+        
+        self.flushing.add(device_id)
+        try:
+            await websocket.send_json({
+                "type": "welcome",
+                "resumed": resumed,
+                "resume_token": state.resume_token,
+                "last_seq": state.last_seq
+            })
+            for message in replay or ():
+                await websocket.send_json(message)
+        finally:
+            self.flushing.discard(device_id)
+        
+        await self.flush_mailbox(device_id)
+    
+    async def _send(self, websocket: WebSocket, device_id: str, message: dict):
+        """Numera a mensagem (seq) e envia; desfaz a numeração se falhar"""
+        state = self.states.get(device_id)
+        if state is not None:
+            message = state.stamp(message)
+        try:
+            await websocket.send_json(message)
+        except Exception:
+            if state is not None:
+                state.unstamp(message)
+            raise
     
-    def disconnect(self, device_id: str):
-        """Remove dispositivo das conexões ativas"""
-        if device_id in self.active_connections:
-            del self.active_connections[device_id]
-            logger.info(f"Dispositivo desconectado: {device_id}")
+    async def flush_mailbox(self, device_id: str):
+        """Entrega, em ordem, as mensagens guardadas enquanto o dispositivo estava offline"""
+        self.flushing.add(device_id)
+        try:
+            while True:
+                pending = self.mailbox.pop_all(device_id)
+                if not pending:
+                    break
+                logger.info(f"Entregando {len(pending)} mensagens pendentes para {device_id}")
+                websocket = self.active_connections.get(device_id)
+                for index, message in enumerate(pending):
+                    try:
+                        await self._send(websocket, device_id, message)
+                    except Exception:
+                        # Socket caiu de novo: devolve o restante ao início da fila
+                        self.mailbox.requeue(device_id, pending[index:], self._mailbox_ttl(device_id))
+                        raise
+        finally:
+            self.flushing.discard(device_id)
+    
+    def ack(self, device_id: str, seq: int):
+        """Registra a confirmação de recebimento enviada pelo cliente"""
+        state = self.states.get(device_id)
+        if state is not None:
+            state.ack(seq)
+    
+    def disconnect(self, device_id: str, websocket: WebSocket, graceful: bool = False):
+        """
+        Remove dispositivo das conexões ativas.
+        Em quedas (graceful=False) as sessões são mantidas por
+        resume_grace_seconds para permitir a retomada.
+        """
+        if self.active_connections.get(device_id) is not websocket:
+            # Handler antigo de uma conexão já substituída
+            return
+        
+        del self.active_connections[device_id]
+        logger.info(f"Dispositivo desconectado: {device_id}")
+        
+        state = self.states.get(device_id)
+        if graceful or state is None:
+            self._cleanup(device_id)
+            return
+        
+        state.cleanup_handle = asyncio.get_running_loop().call_later(
+            settings.resume_grace_seconds, self._expire, device_id
+        )
+    
+    def _expire(self, device_id: str):
+        """Fim do prazo de retomada"""
+        if device_id not in self.active_connections:
+            logger.info(f"Prazo de retomada expirado: {device_id}")
+            self._cleanup(device_id)
+    
+    def _cleanup(self, device_id: str):
+        """Descarta o estado de retomada e limpa as sessões do dispositivo"""
+        state = self.states.pop(device_id, None)
+        if state is not None:
+            state.cancel_cleanup()
+            state.release()
         
-        # Limpar sessões do dispositivo
         for session_id, devices in list(self.sessions.items()):
             if device_id in devices:
                 devices.remove(device_id)
                 if not devices:
                     del self.sessions[session_id]
     
+    async def drain(self, window: float, timeout: float) -> int:
+        """
+        Prepara o encerramento sem derrubar todos de uma vez.
+        Recusa novas conexões, envia a cada dispositivo um "reconnect" com
+        atraso aleatório dentro de `window` (evita que todos reconectem ao
+        mesmo tempo na nova instância) e aguarda até `timeout` segundos os
+        encaminhamentos em andamento e a saída dos clientes, inclusive dos
+        canais de relay. O que restar ao fim é fechado com 1012.
+        Retorna quantos dispositivos foram avisados.
+        """
+        # Import local: relay importa este módulo
+        from .relay import relay_manager
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self.draining = True
+        
+        device_ids = list(self.active_connections)
+        logger.info(f"Drain iniciado: {len(device_ids)} dispositivos conectados")
+        await asyncio.gather(
+            *(
+                self.send_personal_message(
+                    {"type": "reconnect", "delay_ms": int(random.uniform(0, window) * 1000)},
+                    device_id
+                )
+                for device_id in device_ids
+            ),
+            return_exceptions=True
+        )
+        
+        while (
+            self.in_flight or self.active_connections or relay_manager.channels
+        ) and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        
+        websockets = list(self.active_connections.values())
+        for channel in list(relay_manager.channels.values()):
+            websockets.extend(channel.peers.values())
+        for websocket in websockets:
+            try:
+                await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+            except Exception:
+                pass
+        
+        logger.info("Drain concluído")
+        return len(device_ids)
+    
+    def _mailbox_ttl(self, device_id: str) -> Optional[float]:
+        """
+        TTL na mailbox: dispositivos com estado de retomada vivo mantêm as
+        mensagens por todo o prazo de retomada (None = TTL padrão).
+        """
+        if device_id in self.states:
+            return max(settings.mailbox_ttl_seconds, settings.resume_grace_seconds)
+        return None
+    
+    def _store(self, device_id: str, message: dict):
+        """Guarda a mensagem na mailbox até o dispositivo voltar"""
+        self.mailbox.put(device_id, message, self._mailbox_ttl(device_id))
+    
     def is_online(self, device_id: str) -> bool:
         """Verifica se dispositivo está online"""
         return device_id in self.active_connections
     
     async def send_personal_message(self, message: dict, device_id: str):
-        """Envia mensagem para um dispositivo específico"""
-        if device_id in self.active_connections:
-            websocket = self.active_connections[device_id]
-            await websocket.send_json(message)
+        """
+        Envia mensagem para um dispositivo específico.
+        Se o dispositivo estiver offline, a mensagem fica na mailbox até
+        ele reconectar (ou expirar).
+        """
+        if not device_id:
+            return
+        
+        websocket = self.active_connections.get(device_id)
+        if websocket is None or device_id in self.flushing:
+            self._store(device_id, message)
+            return
+        
+        try:
+            await self._send(websocket, device_id, message)
             logger.debug(f"Mensagem enviada para {device_id}: {message.get('type')}")
+        except Exception as e:
+            logger.warning(f"Falha ao enviar para {device_id}, guardando na mailbox: {e}")
+            self._store(device_id, message)
     
     async def broadcast_to_session(self, message: dict, session_id: str, exclude: str = None):
         """Envia mensagem para todos os dispositivos de uma sessão"""
@@ -72,144 +291,184 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
-async def handle_signaling(websocket: WebSocket, device_id: str):
+def authorize_connection(device_id: str, token: Optional[str], required: bool = False) -> bool:
+    """
+    Valida o token do dispositivo (verificação local, sem banco).
+    Sem token, só aceita se não for obrigatório (`required` ou configuração).
+    """
+    if token is None:
+        return not (required or settings.require_device_token)
+    return verify_device_token(token, device_id)
+
+
+async def handle_signaling(
+    websocket: WebSocket,
+    device_id: str,
+    token: Optional[str] = None,
+    resume_token: Optional[str] = None,
+    last_seq: Optional[int] = None
+):
     """
     Handler principal para conexões WebSocket de sinalização.
     Processa mensagens de sinalização WebRTC.
     """
-    await manager.connect(websocket, device_id)
+    if not authorize_connection(device_id, token):
+        logger.warning(f"Conexão recusada (token inválido): {device_id}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    if manager.draining:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    
+    graceful = False
     
     try:
+        await manager.connect(websocket, device_id, resume_token, last_seq)
+        
         while True:
             # Receber mensagem
             data = await websocket.receive_json()
-            message_type = data.get("type")
-            
-            logger.debug(f"Mensagem recebida de {device_id}: {message_type}")
-            
-            # Processar diferentes tipos de mensagem
-            if message_type == "ping":
-                # Heartbeat para manter conexão ativa
-                await manager.send_personal_message(
-                    {"type": "pong", "timestamp": datetime.utcnow().isoformat()},
-                    device_id
-                )
-            
-            elif message_type == "connection_request":
-                # Pedido de conexão para outro dispositivo
-                target_id = data.get("target_id")
+            manager.in_flight += 1
+            try:
+                message_type = data.get("type")
+                
+                logger.debug(f"Mensagem recebida de {device_id}: {message_type}")
+                
+                # Confirmação de recebimento (tipo "ack" ou campo "ack" em qualquer mensagem)
+                if message_type == "ack" or "ack" in data:
+                    ack = data.get("seq") if message_type == "ack" else data.get("ack")
+                    if isinstance(ack, int):
+                        manager.ack(device_id, ack)
+                
+                # Processar diferentes tipos de mensagem
+                if message_type == "ack":
+                    pass
+                
+                elif message_type == "ping":
+                    # Heartbeat para manter conexão ativa
+                    await manager.send_personal_message(
+                        {"type": "pong", "timestamp": datetime.utcnow().isoformat()},
+                        device_id
+                    )
                 
-                if not manager.is_online(target_id):
+                elif message_type == "connection_request":
+                    # Pedido de conexão para outro dispositivo
+                    target_id = data.get("target_id")
+                    
+                    if not manager.is_online(target_id):
+                        await manager.send_personal_message(
+                            {
+                                "type": "connection_response",
+                                "success": False,
+                                "error": "Dispositivo offline"
+                            },
+                            device_id
+                        )
+                    else:
+                        # Encaminhar pedido para o dispositivo alvo
+                        await manager.send_personal_message(
+                            {
+                                "type": "connection_request",
+                                "from_device": device_id,
+                                "requester_name": data.get("requester_name", "Unknown")
+                            },
+                            target_id
+                        )
+                
+                elif message_type == "connection_accept":
+                    # Host aceitou a conexão
+                    session_id = data.get("session_id")
+                    requester_id = data.get("requester_id")
+                    
+                    # Adicionar ambos à sessão
+                    manager.add_to_session(session_id, device_id)
+                    manager.add_to_session(session_id, requester_id)
+                    
+                    # Notificar requester
                     await manager.send_personal_message(
                         {
-                            "type": "connection_response",
-                            "success": False,
-                            "error": "Dispositivo offline"
+                            "type": "connection_accepted",
+                            "session_id": session_id,
+                            "host_id": device_id,
+                            "ice_servers": ice_provider.get_ice_servers(
+                                session_id, data.get("region")
+                            )
                         },
-                        device_id
+                        requester_id
                     )
-                else:
-                    # Encaminhar pedido para o dispositivo alvo
+                
+                elif message_type == "connection_reject":
+                    # Host rejeitou a conexão
+                    requester_id = data.get("requester_id")
+                    reason = data.get("reason", "Conexão rejeitada")
+                    
                     await manager.send_personal_message(
                         {
-                            "type": "connection_request",
-                            "from_device": device_id,
-                            "requester_name": data.get("requester_name", "Unknown")
+                            "type": "connection_rejected",
+                            "reason": reason
                         },
-                        target_id
+                        requester_id
                     )
-            
-            elif message_type == "connection_accept":
-                # Host aceitou a conexão
-                session_id = data.get("session_id")
-                requester_id = data.get("requester_id")
                 
-                # Adicionar ambos à sessão
-                manager.add_to_session(session_id, device_id)
-                manager.add_to_session(session_id, requester_id)
+                elif message_type == "offer":
+                    # SDP Offer - encaminhar para o peer
+                    target_id = data.get("target_id")
+                    await manager.send_personal_message(
+                        {
+                            "type": "offer",
+                            "sdp": data.get("sdp"),
+                            "from_device": device_id
+                        },
+                        target_id
+                    )
                 
-                # Notificar requester
-                await manager.send_personal_message(
-                    {
-                        "type": "connection_accepted",
-                        "session_id": session_id,
-                        "host_id": device_id,
-                        "ice_servers": [
-                            {"urls": "stun:stun.l.google.com:19302"},
-                            {"urls": "stun:stun1.l.google.com:19302"}
-                        ]
-                    },
-                    requester_id
-                )
-            
-            elif message_type == "connection_reject":
-                # Host rejeitou a conexão
-                requester_id = data.get("requester_id")
-                reason = data.get("reason", "Conexão rejeitada")
+                elif message_type == "answer":
+                    # SDP Answer - encaminhar para o peer
+                    target_id = data.get("target_id")
+                    await manager.send_personal_message(
+                        {
+                            "type": "answer",
+                            "sdp": data.get("sdp"),
+                            "from_device": device_id
+                        },
+                        target_id
+                    )
                 
-                await manager.send_personal_message(
-                    {
-                        "type": "connection_rejected",
-                        "reason": reason
-                    },
-                    requester_id
-                )
-            
-            elif message_type == "offer":
-                # SDP Offer - encaminhar para o peer
-                target_id = data.get("target_id")
-                await manager.send_personal_message(
-                    {
-                        "type": "offer",
-                        "sdp": data.get("sdp"),
-                        "from_device": device_id
-                    },
-                    target_id
-                )
-            
-            elif message_type == "answer":
-                # SDP Answer - encaminhar para o peer
-                target_id = data.get("target_id")
-                await manager.send_personal_message(
-                    {
-                        "type": "answer",
-                        "sdp": data.get("sdp"),
-                        "from_device": device_id
-                    },
-                    target_id
-                )
-            
-            elif message_type == "ice_candidate":
-                # ICE Candidate - encaminhar para o peer
-                target_id = data.get("target_id")
-                await manager.send_personal_message(
-                    {
-                        "type": "ice_candidate",
-                        "candidate": data.get("candidate"),
-                        "sdp_mid": data.get("sdp_mid"),
-                        "sdp_m_line_index": data.get("sdp_m_line_index"),
-                        "from_device": device_id
-                    },
-                    target_id
-                )
-            
-            elif message_type == "disconnect":
-                # Encerrar sessão
-                session_id = data.get("session_id")
-                if session_id:
-                    await manager.broadcast_to_session(
-                        {"type": "peer_disconnected", "device_id": device_id},
-                        session_id,
-                        exclude=device_id
+                elif message_type == "ice_candidate":
+                    # ICE Candidate - encaminhar para o peer
+                    target_id = data.get("target_id")
+                    await manager.send_personal_message(
+                        {
+                            "type": "ice_candidate",
+                            "candidate": data.get("candidate"),
+                            "sdp_mid": data.get("sdp_mid"),
+                            "sdp_m_line_index": data.get("sdp_m_line_index"),
+                            "from_device": device_id
+                        },
+                        target_id
                     )
-                break
-            
-            else:
-                logger.warning(f"Tipo de mensagem desconhecido: {message_type}")
+                
+                elif message_type == "disconnect":
+                    # Encerrar sessão
+                    session_id = data.get("session_id")
+                    if session_id:
+                        await manager.broadcast_to_session(
+                            {"type": "peer_disconnected", "device_id": device_id},
+                            session_id,
+                            exclude=device_id
+                        )
+                    graceful = True
+                    break
+                
+                else:
+                    logger.warning(f"Tipo de mensagem desconhecido: {message_type}")
+            finally:
+                manager.in_flight -= 1
     
     except WebSocketDisconnect:
         logger.info(f"WebSocket desconectado: {device_id}")
     except Exception as e:
         logger.error(f"Erro no WebSocket {device_id}: {e}")
     finally:
-        manager.disconnect(device_id)
+        manager.disconnect(device_id, websocket, graceful)
@@ -0,0 +1,83 @@
+"""
+RemotDesk Server - Benchmark das rotas HTTP
+Mede requisições/s de um worker (em processo, sem rede) para cada rota,
+usando um banco SQLite temporário.
+
+Requer httpx (só para o benchmark, fora do requirements.txt):
+    pip install httpx
+
+Uso (a partir de server/):
+    python -m benchmarks.bench_api
+    FAST_JSON=false python -m benchmarks.bench_api   # comparação
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+# Banco isolado antes de importar a aplicação
+_tmpdir = tempfile.mkdtemp(prefix="remotdesk-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmpdir}/bench.db")
+# Sem echo de SQL nem logs por requisição distorcendo a medição
+os.environ.setdefault("DEBUG", "false")
+
+import httpx  # noqa: E402
+
+from app.core.responses import FAST_JSON  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+async def _measure(client: httpx.AsyncClient, method: str, url: str, duration: float, **kwargs) -> float:
+    """Executa a requisição em loop por `duration` segundos e retorna req/s"""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+async def run(duration: float):
+    logging.disable(logging.INFO)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            host = (await client.post("/api/devices/register", json={"name": "host"})).json()
+            viewer = (await client.post("/api/devices/register", json={"name": "viewer"})).json()
+            host_headers = {"Authorization": f"Bearer {host['access_token']}"}
+            headers = {"Authorization": f"Bearer {viewer['access_token']}"}
+            await client.put(f"/api/devices/{host['id']}/online", headers=host_headers)
+            session = (await client.post(
+                "/api/sessions/create",
+                json={"target_device_id": host["id"], "viewer_device_id": viewer["id"]},
+                headers=headers
+            )).json()
+
+            routes = [
+                ("GET", "/", {}),
+                ("GET", "/health", {}),
+                ("GET", f"/api/devices/{host['id']}", {}),
+                ("GET", f"/api/sessions/{session['id']}", {"headers": headers}),
+                ("GET", f"/api/devices/{viewer['id']}/sessions", {"headers": headers}),
+                ("GET", f"/api/devices/{viewer['id']}/logs", {"headers": headers}),
+            ]
+
+            print(f"fast_json={'on' if FAST_JSON else 'off'}  duração={duration}s por rota")
+            for method, url, kwargs in routes:
+                rate = await _measure(client, method, url, duration, **kwargs)
+                print(f"{method:4} {url:60} {rate:10.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas HTTP (um worker)")
+    parser.add_argument("--duration", type=float, default=3.0, help="segundos por rota")
+    args = parser.parse_args()
+    asyncio.run(run(args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+RemotDesk Server - Benchmark de Cold Start
+Mede, em processos novos:
+  - tempo de importação de app.main
+  - tempo até a primeira resposta 200 de /health (uvicorn + lifespan)
+e falha (exit 1) se algum passar do orçamento ou se dependências pesadas
+voltarem a ser importadas junto com a aplicação.
+
+Uso (a partir de server/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --import-budget 1.0 --healthy-budget 2.5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# Orçamentos padrão (segundos); ajuste junto com a mudança que os justificar
+IMPORT_BUDGET_SECONDS = 1.0
+HEALTHY_BUDGET_SECONDS = 2.5
+
+# Módulos que devem carregar só no primeiro uso, nunca em "import app.main"
+LAZY_MODULES = ("jose", "passlib", "bcrypt", "cryptography", "aiosqlite", "pyarrow")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def _env(tmpdir: str) -> dict:
+    """Ambiente isolado: banco temporário e sem echo de SQL"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmpdir}/bench.db")
+    env.setdefault("DEBUG", "false")
+    return env
+
+
+def measure_import(env: dict) -> dict:
+    """Importa a aplicação num interpretador novo"""
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_healthy(env: dict, timeout: float = 30.0) -> float:
+    """Sobe o uvicorn e mede o tempo até /health responder 200"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn encerrou com código {process.returncode}")
+            time.sleep(0.01)
+        raise TimeoutError(f"/health não respondeu em {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de cold start")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    parser.add_argument("--healthy-budget", type=float, default=HEALTHY_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    env = _env(tempfile.mkdtemp(prefix="remotdesk-bench-"))
+    imports = [measure_import(env) for _ in range(args.runs)]
+    healthy = [measure_healthy(env) for _ in range(args.runs)]
+
+    import_seconds = statistics.median(result["seconds"] for result in imports)
+    healthy_seconds = statistics.median(healthy)
+    loaded = sorted({module for result in imports for module in result["loaded"]})
+
+    print(f"import app.main        {import_seconds * 1000:8.1f} ms (orçamento {args.import_budget * 1000:.0f} ms)")
+    print(f"primeiro /health 200   {healthy_seconds * 1000:8.1f} ms (orçamento {args.healthy_budget * 1000:.0f} ms)")
+
+    failures = []
+    if import_seconds > args.import_budget:
+        failures.append("importação acima do orçamento")
+    if healthy_seconds > args.healthy_budget:
+        failures.append("primeira resposta saudável acima do orçamento")
+    if loaded:
+        failures.append(f"módulos pesados importados com a aplicação: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())